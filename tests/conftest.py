@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -36,4 +38,12 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'core.pytest_plugin',
 ]
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnail_jobs(settings):
+    # миниатюры генерируются в том же потоке, иначе пул может писать
+    # во временный MEDIA_ROOT уже после завершения теста
+    settings.THUMBNAIL_WORKERS = 0
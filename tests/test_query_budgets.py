@@ -0,0 +1,24 @@
+import pytest
+
+from core.query_budget import QueryBudgetExceeded
+from posts.urls import QUERY_BUDGETS
+
+
+class TestQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.query_budget(QUERY_BUDGETS['group_list'])
+    def test_group_page_fits_budget(self, user_client, few_posts_with_group):
+        response = user_client.get(f'/group/{few_posts_with_group.group.slug}/')
+        assert response.status_code == 200, 'Страница группы не открывается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_budget_fixture_reports_duplicates(self, query_budget, few_posts_with_group):
+        posts = type(few_posts_with_group).objects.all()[:3]
+        with pytest.raises(QueryBudgetExceeded) as error:
+            with query_budget(1):
+                for post in posts:
+                    post.author.username
+        assert 'Повторяющиеся запросы' in str(error.value), (
+            'Отчёт о превышении бюджета должен группировать повторы'
+        )
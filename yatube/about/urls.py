@@ -9,3 +9,9 @@ urlpatterns = [
     path('author/', views.AboutAuthorView.as_view(), name='author'),
     path('tech/', views.AboutTechView.as_view(), name='tech'),
 ]
+
+# Бюджет SQL-запросов (core/tests/test_query_budgets.py)
+QUERY_BUDGETS = {
+    'author': 2,
+    'tech': 2,
+}
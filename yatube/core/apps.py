@@ -1,5 +1,20 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .sqlite import configure_sqlite
+
+        connection_created.connect(configure_sqlite)
+        if settings.SLOW_QUERY_LOG:
+            from .slowlog import install
+
+            directory = os.path.dirname(settings.SLOW_QUERY_FILE)
+            os.makedirs(directory, exist_ok=True)
+            connection_created.connect(install)
@@ -0,0 +1,151 @@
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+
+from .perf import record_cache
+
+_MISSING = object()
+
+
+class TwoLevelCache(BaseCache):
+    """Кэш из двух уровней: L1 в памяти процесса перед общим L2"""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 2)
+        self.l1 = LocMemCache(
+            f'l1-{location}',
+            {'OPTIONS': {'MAX_ENTRIES': options.get('L1_MAX_ENTRIES', 1000)}},
+        )
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _l1_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.l1.get(key, _MISSING, version)
+        if value is _MISSING:
+            value = self.shared.get(key, _MISSING, version)
+            if value is _MISSING:
+                record_cache(0, 1)
+                return default
+            self.l1.set(key, value, self.l1_timeout, version)
+        record_cache(1, 0)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.l1.set(key, value, self._l1_ttl(timeout), version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.l1.set(key, value, self._l1_ttl(timeout), version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(key, version)
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version)
+        self.shared.delete(key, version)
+
+    def get_many(self, keys, version=None):
+        found = self.l1.get_many(keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version)
+            if shared:
+                self.l1.set_many(shared, self.l1_timeout, version)
+            found.update(shared)
+        record_cache(len(found), len(keys) - len(found))
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        self.l1.set_many(data, self._l1_ttl(timeout), version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        self.l1.delete_many(keys, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        self.l1.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def shared_cache(alias='default'):
+    """Общий для всех процессов уровень кэша (или сам кэш, если он один)"""
+    cache = caches[alias]
+    return getattr(cache, 'shared', cache)
+
+
+def get_or_recompute(
+    key,
+    compute,
+    timeout,
+    beta=1.0,
+    lock_timeout=10,
+    wait=0.05,
+    alias='default',
+):
+    """Значение из кэша с защитой от одновременного пересчёта"""
+    cache = caches[alias]
+    lock = shared_cache(alias)
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, expires, delta = entry
+        early = now - delta * beta * math.log(1 - random.random())
+        if early < expires:
+            return value
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if not lock.add(lock_key, token, lock_timeout):
+        if entry is not None:
+            return entry[0]
+        deadline = now + lock_timeout
+        while time.time() < deadline:
+            time.sleep(wait)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # блокировка чужая: считаем сами, но не снимаем её
+        return compute()
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(key, (value, time.time() + timeout, delta), timeout)
+        return value
+    finally:
+        # блокировка могла истечь и достаться другому процессу
+        if lock.get(lock_key) == token:
+            lock.delete(lock_key)
@@ -0,0 +1,44 @@
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import DEFAULT_PRAGMAS, concurrency_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентное чтение и запись в SQLite в режиме '
+        'по умолчанию и с SQLITE_PRAGMAS из настроек'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--rows', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"режим":<10}{"операция":<10}{"оп/с":>8}{"p50, мс":>9}'
+            f'{"p99, мс":>9}{"занято":>8}'
+        )
+        for title, pragmas in (
+            ('до', DEFAULT_PRAGMAS),
+            ('после', settings.SQLITE_PRAGMAS),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                result = concurrency_benchmark(
+                    directory,
+                    pragmas,
+                    options['readers'],
+                    options['writers'],
+                    options['seconds'],
+                    options['rows'],
+                )
+            for role, metrics in result.items():
+                self.stdout.write(
+                    f'{title:<10}{role:<10}{metrics["ops_per_s"]:>8}'
+                    f'{metrics["p50_ms"]:>9}{metrics["p99_ms"]:>9}'
+                    f'{metrics["errors"]:>8}'
+                )
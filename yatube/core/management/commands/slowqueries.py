@@ -0,0 +1,91 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.query_budget import normalize_sql
+from core.slowlog import read_log
+
+SORT_KEYS = {
+    'total': lambda group: group['total'],
+    'count': lambda group: group['count'],
+    'max': lambda group: group['max'],
+}
+
+
+def summarize(records):
+    """Группирует записи журнала по запросу без литералов"""
+    groups = defaultdict(
+        lambda: {
+            'count': 0,
+            'total': 0.0,
+            'max': 0.0,
+            'views': Counter(),
+            'sources': Counter(),
+            'templates': Counter(),
+            'explain': None,
+        }
+    )
+    for record in records:
+        group = groups[normalize_sql(record['sql'])]
+        group['count'] += 1
+        group['total'] += record['ms']
+        if record['ms'] >= group['max']:
+            group['max'] = record['ms']
+            group['explain'] = record.get('explain')
+        for key, field in (
+            ('views', 'view'),
+            ('sources', 'source'),
+            ('templates', 'template'),
+        ):
+            if record.get(field):
+                group[key][record[field]] += 1
+    return groups
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных SQL-запросов (SLOW_QUERY_LOG)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=settings.SLOW_QUERY_FILE,
+            help='Журнал (ротированные копии .1, .2… читаются тоже)',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='total',
+            help='Порядок: суммарное время, число или максимум',
+        )
+        parser.add_argument(
+            '--top', type=int, default=10, help='Сколько запросов показать'
+        )
+
+    def handle(self, *args, **options):
+        groups = summarize(read_log(options['file']))
+        if not groups:
+            self.stdout.write('Медленных запросов не найдено')
+            return
+        ranked = sorted(
+            groups.items(),
+            key=lambda item: SORT_KEYS[options['sort']](item[1]),
+            reverse=True,
+        )
+        for sql, group in ranked[:options['top']]:
+            self.stdout.write(
+                f'{group["count"]} раз, всего {group["total"]:.1f} мс, '
+                f'среднее {group["total"] / group["count"]:.1f} мс, '
+                f'максимум {group["max"]:.1f} мс'
+            )
+            self.stdout.write(f'  {sql}')
+            for title, key in (
+                ('вьюхи', 'views'),
+                ('код', 'sources'),
+                ('шаблоны', 'templates'),
+            ):
+                for place, count in group[key].most_common(3):
+                    self.stdout.write(f'  {title}: {place} ({count})')
+            for line in group['explain'] or ():
+                self.stdout.write(f'  план: {line}')
+            self.stdout.write('')
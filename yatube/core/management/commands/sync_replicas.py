@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.replicas import sync_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в реплики DB_REPLICAS '
+        '(локальная замена репликации)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Повторять каждые N секунд (0 – один раз)',
+        )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError(
+                'Копирование файлов есть только для SQLite, '
+                'реплики других СУБД синхронизирует сама СУБД'
+            )
+        while True:
+            replicas = sync_replicas()
+            if not replicas:
+                raise CommandError('Реплики не заданы: укажите DB_REPLICAS')
+            self.stdout.write(f'Синхронизированы: {", ".join(replicas)}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,201 @@
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм: миллисекунды и штуки
+TIME_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+COUNT_BOUNDS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+METRICS = {
+    'wall_ms': TIME_BOUNDS,
+    'db_queries': COUNT_BOUNDS,
+    'db_ms': TIME_BOUNDS,
+    'template_ms': TIME_BOUNDS,
+    'cache_hits': COUNT_BOUNDS,
+    'cache_misses': COUNT_BOUNDS,
+}
+PERCENTILES = (50, 90, 99)
+UNRESOLVED = '<unresolved>'
+
+_current = ContextVar('perf_sample', default=None)
+
+
+class Histogram:
+    """Фиксированные корзины: память не растёт с трафиком"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, rank):
+        """Верхняя граница корзины, в которую попадает ранг"""
+        needed = rank / 100 * self.count
+        seen = 0
+        for bound, hits in zip(self.bounds, self.buckets):
+            seen += hits
+            if hits and seen >= needed:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        result = {
+            f'p{rank}': self.percentile(rank) for rank in PERCENTILES
+        }
+        result.update(
+            count=self.count,
+            sum=round(self.total, 2),
+            max=round(self.max, 2),
+            buckets={
+                str(bound): hits
+                for bound, hits in zip(self.bounds + ('+Inf',), self.buckets)
+            },
+        )
+        return result
+
+
+class Registry:
+    """Гистограммы метрик по вьюхам, общие для потоков"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.since = timezone.now()
+
+    def observe(self, view_name, sample):
+        with self.lock:
+            histograms = self.views.get(view_name)
+            if histograms is None:
+                histograms = self.views[view_name] = {
+                    metric: Histogram(bounds)
+                    for metric, bounds in METRICS.items()
+                }
+            for metric, histogram in histograms.items():
+                histogram.observe(sample[metric])
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'since': self.since.isoformat(),
+                'sample_rate': sample_rate(),
+                'views': {
+                    view_name: {
+                        metric: histogram.as_dict()
+                        for metric, histogram in histograms.items()
+                    }
+                    for view_name, histograms in sorted(self.views.items())
+                },
+            }
+
+
+registry = Registry()
+
+
+def sample_rate():
+    return getattr(settings, 'PERF_SAMPLE_RATE', 0)
+
+
+def record_cache(hits, misses):
+    """Вызывается бэкендом кэша; вне замера ничего не делает"""
+    sample = _current.get()
+    if sample is not None:
+        sample['cache_hits'] += hits
+        sample['cache_misses'] += misses
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        sample = _current.get()
+        # вложенные include рендерятся внутри внешнего шаблона
+        if sample is None or sample['_depth']:
+            return render(self, context)
+        sample['_depth'] += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            sample['template_ms'] += (time.perf_counter() - started) * 1000
+            sample['_depth'] -= 1
+
+    wrapper.perf_original = render
+    return wrapper
+
+
+def _timed_queries(sample):
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            sample['db_queries'] += 1
+            sample['db_ms'] += (time.perf_counter() - started) * 1000
+
+    return wrapper
+
+
+class PerformanceMiddleware:
+    """Замеры времени, запросов, шаблонов и кэша для доли запросов"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not hasattr(Template.render, 'perf_original'):
+            Template.render = _timed_render(Template.render)
+
+    def __call__(self, request):
+        if random.random() >= sample_rate():
+            return self.get_response(request)
+        sample = dict.fromkeys(METRICS, 0)
+        sample['_depth'] = 0
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_timed_queries(sample))
+                    )
+                response = self.get_response(request)
+        finally:
+            sample['wall_ms'] = (time.perf_counter() - started) * 1000
+            _current.reset(token)
+        del sample['_depth']
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else UNRESOLVED
+        registry.observe(view_name, sample)
+        logger.info(
+            json.dumps(
+                {
+                    'view': view_name,
+                    'method': request.method,
+                    'status': response.status_code,
+                    **{
+                        metric: round(value, 2)
+                        for metric, value in sample.items()
+                    },
+                }
+            )
+        )
+        return response
@@ -0,0 +1,35 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .query_budget import QueryBudgetExceeded, budget_report
+from .query_budget import query_budget as query_budget_context
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(n): тест выполняет не больше n SQL-запросов',
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    budget = marker.args[0]
+    with CaptureQueriesContext(connection) as queries:
+        outcome = yield
+    # упавший тест и так покажет свою ошибку
+    if outcome.excinfo is None and len(queries) > budget:
+        raise QueryBudgetExceeded(
+            budget_report(item.nodeid, budget, queries.captured_queries)
+        )
+
+
+@pytest.fixture
+def query_budget(db):
+    """Бюджет запросов в тесте: with query_budget(3): ..."""
+    return query_budget_context
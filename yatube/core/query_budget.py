@@ -0,0 +1,50 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\s*\?\s*,?)+\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize_sql(sql):
+    """Запрос без литералов: одинаковые по форме запросы совпадают"""
+    sql = _NUMBER.sub('?', _STRING.sub('?', sql))
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def duplicated_queries(queries):
+    """[(число повторов, запрос)] для запросов, выполненных больше раза"""
+    counts = Counter(normalize_sql(query['sql']) for query in queries)
+    return [(count, sql) for sql, count in counts.most_common() if count > 1]
+
+
+def budget_report(label, budget, queries):
+    lines = [f'{label}: {len(queries)} SQL-запросов при бюджете {budget}']
+    duplicated = duplicated_queries(queries)
+    if duplicated:
+        lines.append('Повторяющиеся запросы (похоже на N+1):')
+        lines.extend(f'  {count} × {sql}' for count, sql in duplicated)
+    else:
+        lines.append('Все запросы:')
+        lines.extend(f'  {query["sql"]}' for query in queries)
+    return '\n'.join(lines)
+
+
+@contextmanager
+def query_budget(budget, label='Запрос', using=None):
+    """Падает с отчётом о повторах SQL, если запросов больше budget"""
+    context = CaptureQueriesContext(using or connection)
+    with context:
+        yield context
+    if len(context) > budget:
+        raise QueryBudgetExceeded(
+            budget_report(label, budget, context.captured_queries)
+        )
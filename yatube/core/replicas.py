@@ -0,0 +1,94 @@
+import random
+import sqlite3
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Cookie «читать с основной базы»: ставится писавшему пользователю
+PIN_COOKIE = 'db_pin'
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaRouter:
+    """Чтения лент (REPLICA_VIEWS) – с реплики, остальное – с основной базы"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        # свежий вход не должен теряться из-за отставания реплики
+        if not state or model._meta.app_label == 'sessions':
+            return None
+        return state['read']
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.READ_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # реплики получают схему вместе с данными основной базы
+        if db in settings.READ_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Выбирает реплику, если клиент недавно ничего не записывал"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'read': None, 'wrote': False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state['wrote']:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if (
+            state is not None
+            and settings.READ_REPLICAS
+            and request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and PIN_COOKIE not in request.COOKIES
+        ):
+            state['read'] = random.choice(settings.READ_REPLICAS)
+
+
+def copy_database(source, target):
+    """Согласованный снимок SQLite-файла через backup API"""
+    source_db = sqlite3.connect(source)
+    target_db = sqlite3.connect(target)
+    try:
+        source_db.backup(target_db)
+    finally:
+        target_db.close()
+        source_db.close()
+
+
+def sync_replicas():
+    """Копирует основную SQLite-базу во все реплики"""
+    source = connections['default'].settings_dict['NAME']
+    for alias in settings.READ_REPLICAS:
+        copy_database(source, connections[alias].settings_dict['NAME'])
+    return settings.READ_REPLICAS
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.template.base import Node
+from django.utils import timezone
+
+from . import perf
+
+logger = logging.getLogger(__name__)
+
+_RENDER_CODE = Node.render_annotated.__code__
+_explaining = ContextVar('slowlog_explaining', default=False)
+# Обёртки самого замера – не источник запроса
+_INSTRUMENTATION = (__file__, perf.__file__)
+
+
+def project_frame(frame):
+    filename = frame.f_code.co_filename
+    return (
+        filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in filename
+        and filename not in _INSTRUMENTATION
+    )
+
+
+def attribution(frame):
+    """Строка проекта, узел шаблона и вьюха, откуда пришёл запрос"""
+    source = template = view = None
+    while frame is not None and not (source and template and view):
+        if source is None and project_frame(frame):
+            source = '{}:{} in {}'.format(
+                os.path.relpath(frame.f_code.co_filename, settings.BASE_DIR),
+                frame.f_lineno,
+                frame.f_code.co_name,
+            )
+        if template is None and frame.f_code is _RENDER_CODE:
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            if origin is not None:
+                template = f'{origin.template_name}:{node.token.lineno}'
+        if view is None:
+            request = frame.f_locals.get('request')
+            match = getattr(request, 'resolver_match', None)
+            if isinstance(request, HttpRequest) and match is not None:
+                view = match.view_name
+        frame = frame.f_back
+    return {'view': view, 'source': source, 'template': template}
+
+
+def explain(connection, sql, params):
+    """План запроса; во время EXPLAIN обёртка не срабатывает"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    token = _explaining.set(True)
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [' '.join(map(str, row)) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN не удался: {error}']
+    finally:
+        _explaining.reset(token)
+
+
+def slow_query_logger(execute, sql, params, many, context):
+    """Пишет в core.slowlog запросы дольше SLOW_QUERY_MS с EXPLAIN"""
+    if _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        if elapsed >= settings.SLOW_QUERY_MS:
+            connection = context['connection']
+            record = {
+                'time': timezone.now().isoformat(),
+                'ms': round(elapsed, 2),
+                'alias': connection.alias,
+                'sql': sql,
+                'params': None if many else repr(params),
+                **attribution(sys._getframe(1)),
+            }
+            if settings.SLOW_QUERY_EXPLAIN and not many:
+                record['explain'] = explain(connection, sql, params)
+            logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+def install(sender=None, connection=None, **kwargs):
+    """connection_created: ставит обёртку на соединение один раз"""
+    if slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_logger)
+
+
+def log_files(path):
+    """Текущий журнал и его ротированные копии, от старых к новым"""
+    files = [path]
+    number = 1
+    while os.path.exists(f'{path}.{number}'):
+        files.append(f'{path}.{number}')
+        number += 1
+    return [name for name in reversed(files) if os.path.exists(name)]
+
+
+def read_log(path):
+    for name in log_files(path):
+        with open(name, encoding='utf-8') as stream:
+            for line in stream:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
@@ -0,0 +1,130 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+# Режим SQLite «из коробки»: журнал отката и полная синхронизация
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+}
+
+
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def configure_sqlite(sender=None, connection=None, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
+
+
+def connect(path, pragmas):
+    # autocommit: транзакции открываются явно
+    db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    for statement in pragma_statements(pragmas):
+        db.execute(statement)
+    return db
+
+
+def fill(path, pragmas, rows):
+    db = connect(path, pragmas)
+    db.execute(
+        'CREATE TABLE post ('
+        'id INTEGER PRIMARY KEY, author INTEGER, text TEXT, likes INTEGER)'
+    )
+    db.execute('CREATE TABLE comment (post INTEGER, text TEXT)')
+    db.execute('BEGIN')
+    db.executemany(
+        'INSERT INTO post (author, text, likes) VALUES (?, ?, 0)',
+        ((number % 100, f'Пост {number}' * 10) for number in range(rows)),
+    )
+    db.execute('COMMIT')
+    db.close()
+
+
+def read(db, rows):
+    db.execute(
+        'SELECT id, text, likes FROM post ORDER BY id DESC LIMIT 10 OFFSET ?',
+        (random.randrange(rows),),
+    ).fetchall()
+
+
+def write(db, rows):
+    post = random.randrange(1, rows + 1)
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        db.execute('UPDATE post SET likes = likes + 1 WHERE id = ?', (post,))
+        db.execute('INSERT INTO comment VALUES (?, ?)', (post, 'Ок'))
+        db.execute('COMMIT')
+    except sqlite3.Error:
+        db.execute('ROLLBACK')
+        raise
+
+
+def worker(path, pragmas, operation, rows, deadline, stats):
+    db = connect(path, pragmas)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                operation(db, rows)
+            except sqlite3.OperationalError:
+                stats['errors'] += 1
+                continue
+            stats['timings'].append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+
+
+def percentile(values, rank):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[round(rank / 100 * (len(ordered) - 1))]
+
+
+def concurrency_benchmark(
+    directory, pragmas, readers=4, writers=2, seconds=3.0, rows=5000
+):
+    """Читатели и писатели в потоках: скорость, задержки, блокировки"""
+    path = os.path.join(directory, 'concurrency.sqlite3')
+    fill(path, pragmas, rows)
+    roles = {'read': (read, readers), 'write': (write, writers)}
+    stats = {role: [] for role in roles}
+    threads = []
+    deadline = time.perf_counter() + seconds
+    for role, (operation, count) in roles.items():
+        for _ in range(count):
+            thread_stats = {'timings': [], 'errors': 0}
+            stats[role].append(thread_stats)
+            threads.append(
+                threading.Thread(
+                    target=worker,
+                    args=(
+                        path, pragmas, operation, rows, deadline, thread_stats
+                    ),
+                )
+            )
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = {}
+    for role, per_thread in stats.items():
+        timings = [value for item in per_thread for value in item['timings']]
+        result[role] = {
+            'ops_per_s': round(len(timings) / seconds),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'errors': sum(item['errors'] for item in per_thread),
+        }
+    return result
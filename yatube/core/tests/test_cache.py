@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+
+from core.cache import get_or_recompute, shared_cache
+
+
+class TwoLevelCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_values_are_written_to_both_levels(self):
+        """Значение попадает и в L1 процесса, и в общий L2"""
+        cache.set('key', 'value', 60)
+        self.assertEqual(cache.l1.get('key'), 'value')
+        self.assertEqual(caches['shared'].get('key'), 'value')
+
+    def test_l1_is_filled_from_shared_level(self):
+        """Промах L1 читает общий кэш и заполняет L1"""
+        caches['shared'].set('key', 'shared value', 60)
+        self.assertEqual(cache.get('key'), 'shared value')
+        self.assertEqual(cache.l1.get('key'), 'shared value')
+
+    def test_delete_and_incr_reset_l1(self):
+        """Удаление и инкремент не оставляют устаревших копий в L1"""
+        cache.set('counter', 1, 60)
+        self.assertEqual(cache.incr('counter'), 2)
+        self.assertEqual(cache.get('counter'), 2)
+        cache.delete('counter')
+        self.assertIsNone(cache.get('counter'))
+
+    def test_shared_cache_is_l2(self):
+        """shared_cache() отдаёт общий уровень"""
+        self.assertIs(shared_cache(), caches['shared'])
+
+
+class GetOrRecomputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_value_is_computed_once(self):
+        """Значение вычисляется один раз и дальше берётся из кэша"""
+        compute = mock.Mock(return_value='page')
+        for _ in range(3):
+            self.assertEqual(get_or_recompute('feed', compute, 60), 'page')
+        compute.assert_called_once()
+
+    def test_locked_key_serves_previous_value(self):
+        """Пока другой процесс пересчитывает, отдаётся прежнее значение"""
+        cache.set('feed', ('old', 0, 0), 60)
+        shared_cache().add('feed:lock', 1, 10)
+        compute = mock.Mock(return_value='new')
+        self.assertEqual(get_or_recompute('feed', compute, 60), 'old')
+        compute.assert_not_called()
+
+    def test_waiter_does_not_release_foreign_lock(self):
+        """Не дождавшись значения, считает сам и не снимает чужой замок"""
+        shared_cache().add('feed:lock', 1, 10)
+        compute = mock.Mock(return_value='page')
+        self.assertEqual(
+            get_or_recompute(
+                'feed', compute, 60, lock_timeout=0.05, wait=0.01
+            ),
+            'page',
+        )
+        compute.assert_called_once()
+        self.assertEqual(shared_cache().get('feed:lock'), 1)
+
+    def test_expired_lock_taken_by_other_is_kept(self):
+        """Истёкшую и перехваченную блокировку процесс не снимает"""
+        lock = shared_cache()
+
+        def compute():
+            lock.set('feed:lock', 'other', 10)
+            return 'page'
+
+        self.assertEqual(get_or_recompute('feed', compute, 60), 'page')
+        self.assertEqual(lock.get('feed:lock'), 'other')
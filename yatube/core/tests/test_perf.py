@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.perf import COUNT_BOUNDS, Histogram, registry
+from posts.models import Post, User
+
+
+class HistogramTest(TestCase):
+    def test_percentiles_are_bucket_bounds(self):
+        """Перцентиль – верхняя граница корзины, но не больше максимума"""
+        histogram = Histogram(COUNT_BOUNDS)
+        for value in (1, 1, 1, 4, 150):
+            histogram.observe(value)
+        data = histogram.as_dict()
+        self.assertEqual(data['p50'], 1)
+        self.assertEqual(data['p90'], 150)
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['buckets']['5'], 1)
+
+
+@override_settings(PERF_SAMPLE_RATE=1, PERF_METRICS_TOKEN='secret')
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_sampled_request_is_recorded_per_view(self):
+        """Замер попадает в гистограммы своей вьюхи"""
+        with self.assertLogs('core.perf', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        metrics = registry.snapshot()['views']['posts:index']
+        self.assertEqual(metrics['wall_ms']['count'], 1)
+        self.assertGreater(metrics['db_queries']['sum'], 0)
+        self.assertGreater(metrics['template_ms']['sum'], 0)
+        self.assertGreater(metrics['cache_misses']['sum'], 0)
+        self.assertIn('"view": "posts:index"', logs.output[0])
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_skipped(self):
+        """Без выборки запросы не замеряются"""
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(registry.snapshot()['views'], {})
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_metrics_endpoint_is_protected(self):
+        """Метрики видны сотруднику и по токену, остальным – 404"""
+        url = reverse('perf_metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code,
+            404,
+        )
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('views', response.json())
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
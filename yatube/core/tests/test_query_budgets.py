@@ -0,0 +1,159 @@
+import shutil
+import tempfile
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.query_budget import (
+    QueryBudgetExceeded,
+    duplicated_queries,
+    query_budget,
+)
+from posts.constants import COMMENT_QTY, POST_QTY
+from posts.models import Comment, Follow, Group, Post, User
+
+URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+# Адреса, которые принимают только POST: данные формы
+POST_DATA = {'posts:blogpost_like': {'action': 'toggle'}}
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def named_urls():
+    """(имя, шаблон, бюджет) для всех именованных адресов приложений"""
+    for module_name in URLCONFS:
+        module = import_module(module_name)
+        budgets = getattr(module, 'QUERY_BUDGETS', {})
+        for pattern in module.urlpatterns:
+            if pattern.name:
+                yield (
+                    f'{module.app_name}:{pattern.name}',
+                    pattern,
+                    budgets.get(pattern.name),
+                )
+
+
+class QueryBudgetUtilsTest(TestCase):
+    def test_duplicates_are_grouped_without_literals(self):
+        """Запросы, различающиеся только литералами, группируются"""
+        queries = [
+            {'sql': 'SELECT * FROM t WHERE id = 1'},
+            {'sql': 'SELECT * FROM t WHERE id = 2'},
+            {'sql': "SELECT * FROM u WHERE name = 'a' AND id IN (1, 2)"},
+        ]
+        self.assertEqual(
+            duplicated_queries(queries),
+            [(2, 'SELECT * FROM t WHERE id = ?')],
+        )
+
+    def test_exceeded_budget_reports_duplicates(self):
+        """Превышение бюджета падает с отчётом о повторах"""
+        User.objects.create_user(username='first')
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 × SELECT'):
+            with query_budget(1, 'N+1'):
+                for _ in range(2):
+                    User.objects.filter(username='first').first()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class UrlQueryBudgetTest(TestCase):
+    """
+    Every named URL of posts, users and about runs within its declared
+    budget, and the count doesn't grow when the pages fill up.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='budget', description='Описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.other)
+        cls.post = cls.add_posts(1)[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def add_posts(cls, count):
+        posts = []
+        for number in range(count):
+            for author in (cls.user, cls.other):
+                post = Post.objects.create(
+                    text=f'Пост {number}',
+                    author=author,
+                    group=cls.group,
+                    image=SimpleUploadedFile(
+                        'budget.gif', SMALL_GIF, 'image/gif'
+                    ),
+                )
+                post.likes.add(cls.user, cls.other)
+                Post.objects.filter(pk=post.pk).update(likes_count=2)
+                Comment.objects.create(post=post, author=cls.other, text='Ок')
+                posts.append(post)
+        return posts
+
+    def url_kwargs(self):
+        # токен сброса зависит от last_login, поэтому берётся после входа
+        user = User.objects.get(pk=self.user.pk)
+        return {
+            'slug': self.group.slug,
+            'post_id': self.post.id,
+            'pk': self.post.id,
+            'username': self.other.username,
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        }
+
+    def count_queries(self):
+        counts = {}
+        for name, pattern, budget in named_urls():
+            client = Client()
+            client.force_login(self.user)
+            kwargs = self.url_kwargs()
+            keys = pattern.pattern.regex.groupindex
+            url = reverse(name, kwargs={key: kwargs[key] for key in keys})
+            cache.clear()
+            with transaction.atomic():
+                with query_budget(budget or 0, name) as queries:
+                    if name in POST_DATA:
+                        client.post(url, POST_DATA[name])
+                    else:
+                        client.get(url)
+                transaction.set_rollback(True)
+            counts[name] = len(queries)
+        return counts
+
+    def test_every_url_declares_budget(self):
+        """У каждого адреса posts, users и about объявлен бюджет"""
+        missing = [name for name, _, budget in named_urls() if budget is None]
+        self.assertEqual(missing, [])
+
+    def test_urls_fit_budget_independent_of_page_size(self):
+        """Число запросов в бюджете и не растёт с наполнением страниц"""
+        before = self.count_queries()
+        self.add_posts(POST_QTY)
+        for _ in range(COMMENT_QTY):
+            Comment.objects.create(
+                post=self.post, author=self.other, text='Ещё'
+            )
+        self.assertEqual(self.count_queries(), before)
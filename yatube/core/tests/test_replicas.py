@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from core.replicas import PIN_COOKIE, ReplicaMiddleware, copy_database
+from posts.models import Post
+
+
+@override_settings(READ_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTest(SimpleTestCase):
+    def request(self, path, method='get', write=False, **cookies):
+        """Прогоняет запрос через middleware; вернёт (база чтения, ответ)"""
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies)
+        request.resolver_match = resolve(path)
+        used = {}
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            used['read'] = router.db_for_read(Post)
+            if write:
+                used['write'] = router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        response = middleware(request)
+        return used, response
+
+    def test_feed_reads_go_to_replica(self):
+        """Чтение ленты идёт с реплики, запись – в основную базу"""
+        used, response = self.request('/')
+        self.assertEqual(used['read'], 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_views_read_primary(self):
+        """Остальные вьюхи читают с основной базы"""
+        used, _ = self.request('/create/')
+        self.assertEqual(used['read'], 'default')
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент читает с основной базы"""
+        used, response = self.request('/', method='post', write=True)
+        self.assertEqual(used['write'], 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        used, _ = self.request('/', **{PIN_COOKIE: '1'})
+        self.assertEqual(used['read'], 'default')
+
+    def test_replica_is_copy_of_primary(self):
+        """Реплика – согласованная копия основного файла"""
+        with tempfile.TemporaryDirectory() as directory:
+            primary = os.path.join(directory, 'primary.sqlite3')
+            replica = os.path.join(directory, 'replica.sqlite3')
+            db = sqlite3.connect(primary)
+            db.execute('CREATE TABLE post (text TEXT)')
+            db.execute("INSERT INTO post VALUES ('Пост')")
+            db.commit()
+            db.close()
+            copy_database(primary, replica)
+            db = sqlite3.connect(replica)
+            rows = db.execute('SELECT text FROM post').fetchall()
+            db.close()
+        self.assertEqual(rows, [('Пост',)])
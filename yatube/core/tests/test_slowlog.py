@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Engine
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.slowlog import slow_query_logger
+from posts.models import Post, User
+
+
+@override_settings(SLOW_QUERY_MS=0, PERF_SAMPLE_RATE=0)
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def logged_records(self, url):
+        with self.assertLogs('core.slowlog', 'WARNING') as logs:
+            with connection.execute_wrapper(slow_query_logger):
+                self.client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_query_is_attributed_to_view_and_line(self):
+        """Запрос в журнале знает вьюху, строку кода и план"""
+        record = self.logged_records(reverse('posts:index'))[0]
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertRegex(record['source'], r'^posts/\w+\.py:\d+ in ')
+        self.assertIn('posts_post', record['explain'][0])
+
+    def test_template_query_is_attributed_to_template_line(self):
+        """Запрос из шаблона знает имя шаблона и строку тега"""
+        source = '\n{% for post in posts %}{{ post }}{% endfor %}'
+        engine = Engine(
+            loaders=[
+                (
+                    'django.template.loaders.locmem.Loader',
+                    {'feed.html': source},
+                )
+            ]
+        )
+        template = engine.get_template('feed.html')
+        with self.assertLogs('core.slowlog', 'WARNING') as logs:
+            with connection.execute_wrapper(slow_query_logger):
+                template.render(Context({'posts': Post.objects.all()}))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['template'], 'feed.html:2')
+        self.assertIsNone(record['view'])
+
+    def test_report_groups_queries(self):
+        """slowqueries группирует журнал по запросу без литералов"""
+        records = self.logged_records(reverse('posts:index'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.log')
+            with open(path, 'w', encoding='utf-8') as stream:
+                for record in records:
+                    stream.write(json.dumps(record) + '\n')
+            with open(f'{path}.1', 'w', encoding='utf-8') as stream:
+                stream.write(json.dumps(records[0]) + '\n')
+            out = StringIO()
+            call_command('slowqueries', file=path, sort='count', stdout=out)
+        report = out.getvalue()
+        self.assertTrue(report.startswith('2 раз'))
+        self.assertIn('вьюхи: posts:index', report)
@@ -0,0 +1,46 @@
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.sqlite import concurrency_benchmark, connect
+
+
+class SqlitePragmasTest(TestCase):
+    def test_new_connections_get_pragmas(self):
+        """Новое соединение получает PRAGMA из настроек"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA temp_store')
+            temp_store = cursor.fetchone()[0]
+        self.assertEqual(
+            busy_timeout, settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+        self.assertEqual(temp_store, 2)
+
+    def test_file_database_switches_to_wal(self):
+        """Файловая база переходит в режим WAL"""
+        with tempfile.TemporaryDirectory() as directory:
+            db = connect(f'{directory}/db.sqlite3', settings.SQLITE_PRAGMAS)
+            mode = db.execute('PRAGMA journal_mode').fetchone()[0]
+            db.close()
+        self.assertEqual(mode, settings.SQLITE_PRAGMAS['journal_mode'])
+
+
+class ConcurrencyBenchmarkTest(SimpleTestCase):
+    def test_reports_both_roles(self):
+        """Бенчмарк меряет и чтение, и запись"""
+        with tempfile.TemporaryDirectory() as directory:
+            result = concurrency_benchmark(
+                directory,
+                settings.SQLITE_PRAGMAS,
+                1,
+                1,
+                seconds=0.2,
+                rows=100,
+            )
+        self.assertEqual(set(result), {'read', 'write'})
+        self.assertGreater(result['read']['ops_per_s'], 0)
+        self.assertGreater(result['write']['ops_per_s'], 0)
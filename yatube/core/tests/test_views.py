@@ -0,0 +1,21 @@
+import tempfile
+
+from django.test import RequestFactory, TestCase
+
+from core.views import IMMUTABLE_MAX_AGE, serve_immutable
+
+
+class ServeImmutableTest(TestCase):
+    def test_hashed_files_are_cached_forever(self):
+        """Файлы с хэшем в имени отдаются с вечным Cache-Control"""
+        with tempfile.TemporaryDirectory() as root:
+            with open(f'{root}/card-480w.0123456789ab.jpg', 'wb') as file:
+                file.write(b'jpeg')
+            request = RequestFactory().get('/')
+            response = serve_immutable(
+                request, 'card-480w.0123456789ab.jpg', document_root=root
+            )
+            cache_control = response['Cache-Control']
+            response.close()
+        self.assertIn(f'max-age={IMMUTABLE_MAX_AGE}', cache_control)
+        self.assertIn('immutable', cache_control)
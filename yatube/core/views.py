@@ -1,4 +1,14 @@
+from django.conf import settings
+from django.http import Http404, JsonResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from django.views.static import serve
+
+from .perf import registry
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
 
 def page_not_found(request, exception):
@@ -11,3 +21,32 @@ def csrf_failure(request, reason=''):
 
 def server_500(request):
     return render(request, 'core/500.html')
+
+
+def serve_immutable(request, path, document_root=None):
+    """Отдаёт файл с хэшем в имени, разрешая кэшировать его навсегда"""
+    response = serve(request, path, document_root)
+    patch_cache_control(
+        response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+    )
+    return response
+
+
+def perf_access(request):
+    """Сотрудник или заголовок Authorization: Bearer <PERF_METRICS_TOKEN>"""
+    if request.user.is_staff:
+        return True
+    token = settings.PERF_METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+@never_cache
+def perf_metrics(request):
+    """Гистограммы middleware производительности; ?reset=1 обнуляет их"""
+    if not perf_access(request):
+        raise Http404
+    snapshot = registry.snapshot()
+    if request.GET.get('reset'):
+        registry.reset()
+    return JsonResponse(snapshot, json_dumps_params={'ensure_ascii': False})
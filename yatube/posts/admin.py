@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 
-from .models import Comment, Follow, Group, Post
+from .models import Comment, Follow, Group, Post, ThumbnailJob
+from .search import build_match, fts_enabled, matching_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,12 +12,25 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по индексу FTS5 вместо LIKE по всей таблице"""
+        match = build_match(search_term)
+        if not match or not fts_enabled():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=RawSQL(*matching_ids(match))), False
+
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = (Follow.__str__, 'pub_date')
 
 
+class ThumbnailJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'post', 'geometry', 'status', 'updated')
+    list_filter = ('status', 'geometry')
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(ThumbnailJob, ThumbnailJobAdmin)
@@ -0,0 +1,122 @@
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+PERCENTILES = (50, 90, 99)
+# Шум таймера: меньшие отклонения задержки не считаются регрессией
+LATENCY_NOISE_MS = 1.0
+
+
+def busiest(queryset, field):
+    return queryset.annotate(n=Count(field)).order_by('-n', 'pk').first()
+
+
+def pick_targets():
+    """Самые «тяжёлые» объекты набора: их страницы и меряются"""
+    return {
+        'reader': busiest(User.objects, 'follower'),
+        'author': busiest(User.objects, 'posts'),
+        'group': busiest(Group.objects, 'posts'),
+        'post': busiest(Post.objects, 'comments'),
+    }
+
+
+def scenarios(targets):
+    """(название вью, метод, адрес) для каждого сценария"""
+    post_id = targets['post'].id
+    return [
+        ('index', 'get', reverse('posts:index')),
+        (
+            'group_posts',
+            'get',
+            reverse('posts:group_list', args=[targets['group'].slug]),
+        ),
+        (
+            'profile',
+            'get',
+            reverse('posts:profile', args=[targets['author'].username]),
+        ),
+        ('post_detail', 'get', reverse('posts:post_detail', args=[post_id])),
+        ('follow_index', 'get', reverse('posts:follow_index')),
+        ('PostLike', 'post', reverse('posts:blogpost_like', args=[post_id])),
+    ]
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    index = round(rank / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def measure(client, method, url, requests, warm):
+    """Перцентили задержки, максимум запросов и пик памяти вьюхи"""
+    send = getattr(client, method)
+    timings, queries = [], []
+    for _ in range(requests):
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            send(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    if not warm:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        send(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result = {
+        f'p{rank}_ms': round(percentile(timings, rank), 2)
+        for rank in PERCENTILES
+    }
+    result['queries'] = max(queries)
+    result['peak_kb'] = round(peak / 1024)
+    return result
+
+
+def run_benchmark(requests=20, warm=False):
+    targets = pick_targets()
+    client = Client()
+    client.force_login(targets['reader'])
+    # первый запрос прогревает импорт шаблонов и модулей
+    client.get(reverse('posts:index'))
+    return {
+        name: measure(client, method, url, requests, warm)
+        for name, method, url in scenarios(targets)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно сохранённого базового замера"""
+    regressions = []
+    for size, views in results.items():
+        for view, metrics in views.items():
+            base = baseline.get(size, {}).get(view)
+            if base is None:
+                continue
+            if metrics['queries'] > base['queries']:
+                regressions.append(
+                    f'{size}/{view}: запросов {metrics["queries"]} '
+                    f'вместо {base["queries"]}'
+                )
+            limit = max(
+                base['p50_ms'] * (1 + tolerance),
+                base['p50_ms'] + LATENCY_NOISE_MS,
+            )
+            if metrics['p50_ms'] > limit:
+                regressions.append(
+                    f'{size}/{view}: p50 {metrics["p50_ms"]} мс '
+                    f'вместо {base["p50_ms"]} мс'
+                )
+    return regressions
@@ -0,0 +1,372 @@
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import bump_listing_generation
+from .constants import FEED_BACKFILL, THUMBNAIL_SIZES
+from .feed import forget_popular_authors, popular_authors
+from .models import (
+    Comment,
+    FeedEntry,
+    Follow,
+    Group,
+    Post,
+    ThumbnailJob,
+    User,
+)
+from .search import fts_enabled, rebuild_index
+from .thumbnails import submit_pending_jobs
+from .utils import actual_likes_count
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (NDJSON, CSV)
+BATCH_SIZE = 1000
+
+Like = Post.likes.through
+
+# Колонки выгрузки: имя в файле -> поле для values_list()
+EXPORT_FIELDS = {
+    'posts': {
+        'id': 'id',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    },
+    'comments': {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+    },
+    'follows': {
+        'user': 'user__username',
+        'author': 'author__username',
+        'pub_date': 'pub_date',
+    },
+    'likes': {
+        'post': 'post_id',
+        'user': 'user__username',
+    },
+}
+EXPORT_QUERYSETS = {
+    'posts': lambda: Post.objects.order_by('id'),
+    'comments': lambda: Comment.objects.order_by('id'),
+    'follows': lambda: Follow.objects.order_by('id'),
+    'likes': lambda: Like.objects.order_by('id'),
+}
+KINDS = tuple(EXPORT_FIELDS)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def guess_format(path):
+    return CSV if path.endswith('.csv') else NDJSON
+
+
+def export_rows(kind, batch_size=BATCH_SIZE):
+    """Строки выгрузки по одной, в памяти не больше batch_size записей"""
+    names, lookups = zip(*EXPORT_FIELDS[kind].items())
+    values = EXPORT_QUERYSETS[kind]().values_list(*lookups)
+    for row in values.iterator(chunk_size=batch_size):
+        yield {
+            name: value.isoformat() if hasattr(value, 'isoformat') else value
+            for name, value in zip(names, row)
+        }
+
+
+def write_rows(rows, kind, fmt, stream):
+    count = 0
+    if fmt == CSV:
+        writer = csv.DictWriter(stream, fieldnames=list(EXPORT_FIELDS[kind]))
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return count
+    for count, row in enumerate(rows, 1):
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return count
+
+
+def read_rows(stream, fmt):
+    if fmt == CSV:
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def parse_date(value):
+    return (parse_datetime(value) if value else None) or timezone.now()
+
+
+def changed_rows():
+    """Счётчик изменённых строк соединения SQLite (None для других СУБД)"""
+    if connection.vendor != 'sqlite':
+        return None
+    connection.ensure_connection()
+    return connection.connection.total_changes
+
+
+@contextmanager
+def explicit_pub_date(*models):
+    """bulk_create сохраняет pub_date из файла, а не время импорта"""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Загружает строки пачками; уже загруженное пропускается"""
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.profiles, self.group_slugs = set(), set()
+        self.has_images = False
+        self.imported = self.skipped = 0
+
+    def run(self, kind, rows):
+        load = getattr(self, f'load_{kind}')
+        with explicit_pub_date(Post, Comment, Follow):
+            for chunk in chunked(rows, self.batch_size):
+                with transaction.atomic():
+                    load(chunk)
+        reset = connection.ops.sequence_reset_sql(no_style(), [Post, Comment])
+        if reset:
+            with connection.cursor() as cursor:
+                for sql in reset:
+                    cursor.execute(sql)
+        if kind == 'posts' and fts_enabled():
+            rebuild_index()
+        if self.has_images:
+            submit_pending_jobs()
+        for username in self.profiles:
+            bump_listing_generation('profile', username)
+        for slug in self.group_slugs:
+            bump_listing_generation('group', slug)
+        return self.imported, self.skipped
+
+    def user_ids(self, usernames):
+        missing = {name for name in usernames if name not in self.users}
+        if missing:
+            unusable = make_password(None)
+            User.objects.bulk_create(
+                [User(username=name, password=unusable) for name in missing],
+                ignore_conflicts=True,
+            )
+            self.users.update(
+                User.objects.filter(username__in=missing).values_list(
+                    'username', 'id'
+                )
+            )
+        return self.users
+
+    def group_ids(self, slugs):
+        missing = {slug for slug in slugs if slug and slug not in self.groups}
+        if missing:
+            Group.objects.bulk_create(
+                [
+                    Group(title=slug, slug=slug, description='')
+                    for slug in missing
+                ],
+                ignore_conflicts=True,
+            )
+            self.groups.update(
+                Group.objects.filter(slug__in=missing).values_list(
+                    'slug', 'id'
+                )
+            )
+        return self.groups
+
+    def known_posts(self, post_ids):
+        known = set(
+            Post.objects.filter(id__in=set(post_ids)).values_list(
+                'id', flat=True
+            )
+        )
+        self.skipped += sum(post_id not in known for post_id in post_ids)
+        return known
+
+    def save(self, model, objects):
+        # размер пачки INSERT выбирает Django: SQLite ограничивает
+        # число параметров и термов в одном запросе
+        before = changed_rows()
+        created = model.objects.bulk_create(objects, ignore_conflicts=True)
+        if before is not None:
+            # bulk_create возвращает и строки, пропущенные при конфликте
+            created = changed_rows() - before
+        else:
+            created = len(created)
+        self.imported += created
+        self.skipped += len(objects) - created
+
+    def load_posts(self, rows):
+        users = self.user_ids(row['author'] for row in rows)
+        groups = self.group_ids(row.get('group') for row in rows)
+        posts = [
+            Post(
+                id=int(row['id']) if row.get('id') else None,
+                author_id=users[row['author']],
+                group_id=groups.get(row.get('group')),
+                text=row['text'],
+                pub_date=parse_date(row.get('pub_date')),
+                image=row.get('image') or '',
+            )
+            for row in rows
+        ]
+        self.save(Post, posts)
+        self.profiles.update(row['author'] for row in rows)
+        self.group_slugs.update(
+            row['group'] for row in rows if row.get('group')
+        )
+        self.fan_out(posts)
+        self.enqueue_images(posts)
+
+    def enqueue_images(self, posts):
+        """Ставит в очередь миниатюры картинок пачки постов"""
+        authors = {post.author_id for post in posts if post.image}
+        if not authors:
+            return
+        self.has_images = True
+        saved = (
+            Post.objects.filter(
+                author_id__in=authors,
+                pub_date__in={post.pub_date for post in posts if post.image},
+            )
+            .exclude(image='')
+            .values_list('id', 'image')
+        )
+        ThumbnailJob.objects.bulk_create(
+            [
+                ThumbnailJob(post_id=post_id, geometry=geometry, source=image)
+                for post_id, image in saved
+                for geometry in THUMBNAIL_SIZES
+            ],
+            ignore_conflicts=True,
+        )
+
+    def fan_out(self, posts):
+        """Раскладывает пачку постов по лентам подписчиков авторов"""
+        popular = popular_authors()
+        authors = {post.author_id for post in posts} - popular
+        followers = {}
+        for user_id, author_id in Follow.objects.filter(
+            author_id__in=authors
+        ).values_list('user_id', 'author_id'):
+            followers.setdefault(author_id, []).append(user_id)
+        # SQLite не возвращает id из bulk_create: посты ищутся по автору и дате
+        posts = Post.objects.filter(
+            author_id__in=followers,
+            pub_date__in={post.pub_date for post in posts},
+        ).values_list('id', 'author_id', 'pub_date')
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+                for post_id, author_id, pub_date in posts
+                for user_id in followers[author_id]
+            ],
+            ignore_conflicts=True,
+        )
+
+    def backfill(self, follows):
+        """Дописывает в ленты новых подписчиков последние посты"""
+        forget_popular_authors()
+        authors = {follow.author_id for follow in follows} - popular_authors()
+        latest = {}
+        for author_id, post_id, pub_date in (
+            Post.objects.filter(author_id__in=authors)
+            .order_by('-author_id', '-pub_date')
+            .values_list('author_id', 'id', 'pub_date')
+            .iterator()
+        ):
+            posts = latest.setdefault(author_id, [])
+            if len(posts) < FEED_BACKFILL:
+                posts.append((post_id, pub_date))
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    user_id=follow.user_id, post_id=post_id, pub_date=pub_date
+                )
+                for follow in follows
+                for post_id, pub_date in latest.get(follow.author_id, ())
+            ],
+            ignore_conflicts=True,
+        )
+
+    def load_comments(self, rows):
+        users = self.user_ids(row['author'] for row in rows)
+        known = self.known_posts([int(row['post']) for row in rows])
+        self.save(
+            Comment,
+            [
+                Comment(
+                    id=int(row['id']) if row.get('id') else None,
+                    post_id=int(row['post']),
+                    author_id=users[row['author']],
+                    text=row['text'],
+                    pub_date=parse_date(row.get('pub_date')),
+                )
+                for row in rows
+                if int(row['post']) in known
+            ],
+        )
+
+    def load_follows(self, rows):
+        users = self.user_ids(
+            name for row in rows for name in (row['user'], row['author'])
+        )
+        follows = [
+            Follow(
+                user_id=users[row['user']],
+                author_id=users[row['author']],
+                pub_date=parse_date(row.get('pub_date')),
+            )
+            for row in rows
+            if row['user'] != row['author']
+        ]
+        self.skipped += len(rows) - len(follows)
+        self.save(Follow, follows)
+        self.backfill(follows)
+        self.profiles.update(
+            name for row in rows for name in (row['user'], row['author'])
+        )
+
+    def load_likes(self, rows):
+        users = self.user_ids(row['user'] for row in rows)
+        known = self.known_posts([int(row['post']) for row in rows])
+        self.save(
+            Like,
+            [
+                Like(post_id=int(row['post']), user_id=users[row['user']])
+                for row in rows
+                if int(row['post']) in known
+            ],
+        )
+        Post.objects.filter(pk__in=known).update(
+            likes_count=actual_likes_count()
+        )
@@ -0,0 +1,140 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+
+from core.cache import get_or_recompute, shared_cache
+from .constants import LISTING_CACHE_TIMEOUT
+from .models import Group, ThumbnailJob, User
+from .paginator import CURSOR_PARAM
+
+CARD_VERSION_KEY = 'card_version:{kind}:{pk}'
+THUMBNAILS_KEY = 'post_images:{pk}'
+THUMBNAIL_FIELDS = ('url', 'srcset', 'webp_srcset', 'status')
+LISTING_GENERATION_KEY = 'listing_gen:{kind}:{ident}'
+LISTING_KEY = 'listing:{kind}:{ident}:{cursor}:{generation}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:8]
+
+
+def bump_card_version(kind, pk):
+    """Сбрасывает закэшированные карточки постов поста, группы или автора"""
+    shared_cache().set(
+        CARD_VERSION_KEY.format(kind=kind, pk=pk), _new_version(), None
+    )
+
+
+def attach_card_versions(posts):
+    """Версии карточек страницы из версий поста, группы и автора"""
+    posts = list(posts)
+    post_keys = {}
+    for post in posts:
+        post_keys[post.id] = [
+            CARD_VERSION_KEY.format(kind='post', pk=post.id),
+            CARD_VERSION_KEY.format(kind='group', pk=post.group_id),
+            CARD_VERSION_KEY.format(kind='user', pk=post.author_id),
+        ]
+    all_keys = {key for keys in post_keys.values() for key in keys}
+    versions = shared_cache().get_many(all_keys)
+    missing = {key: _new_version() for key in all_keys - versions.keys()}
+    if missing:
+        shared_cache().set_many(missing, None)
+        versions.update(missing)
+    for post in posts:
+        post.card_version = '.'.join(
+            versions[key] for key in post_keys[post.id]
+        )
+
+
+def listing_generation(kind, ident):
+    # ключ живёт не дольше страниц: несуществующие slug и имена
+    # не копятся в кэше, а новое поколение лишь промахивается мимо старых
+    key = LISTING_GENERATION_KEY.format(kind=kind, ident=ident)
+    generation = shared_cache().get(key)
+    if generation is None:
+        generation = _new_version()
+        shared_cache().set(key, generation, LISTING_CACHE_TIMEOUT)
+    return generation
+
+
+def bump_listing_generation(kind, ident):
+    """Делает устаревшими все закэшированные страницы группы или профиля"""
+    shared_cache().set(
+        LISTING_GENERATION_KEY.format(kind=kind, ident=ident),
+        _new_version(),
+        LISTING_CACHE_TIMEOUT,
+    )
+
+
+def bump_post_listings(post, group_ids=()):
+    """Сбрасывает кэш профиля автора и групп поста (и прежней группы)"""
+    for username in User.objects.filter(id=post.author_id).values_list(
+        'username', flat=True
+    ):
+        bump_listing_generation('profile', username)
+    group_ids = set(group_ids) | {post.group_id}
+    for slug in Group.objects.filter(id__in=group_ids).values_list(
+        'slug', flat=True
+    ):
+        bump_listing_generation('group', slug)
+
+
+def cache_listing(kind, lookup):
+    """Кэширует страницы группы и профиля для гостей до смены поколения"""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            ident = kwargs[lookup]
+            cursor = hashlib.md5(
+                request.GET.get(CURSOR_PARAM, '').encode()
+            ).hexdigest()
+            key = LISTING_KEY.format(
+                kind=kind,
+                ident=ident,
+                cursor=cursor,
+                generation=listing_generation(kind, ident),
+            )
+            return get_or_recompute(
+                key,
+                lambda: view(request, *args, **kwargs),
+                LISTING_CACHE_TIMEOUT,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def attach_thumbnails(posts):
+    """Миниатюры постов страницы: get_many и один запрос на промахи"""
+    posts = [post for post in posts if post.image]
+    if not posts:
+        return
+    keys = {THUMBNAILS_KEY.format(pk=post.id): post for post in posts}
+    found = cache.get_many(keys)
+    missing = [post.id for key, post in keys.items() if key not in found]
+    if missing:
+        loaded = {pk: {} for pk in missing}
+        for job in ThumbnailJob.objects.filter(
+            post_id__in=missing, status__in=ThumbnailJob.FINISHED
+        ).values('post_id', 'geometry', *THUMBNAIL_FIELDS):
+            loaded[job['post_id']][job['geometry']] = {
+                field: job[field] for field in THUMBNAIL_FIELDS
+            }
+        fresh = {
+            THUMBNAILS_KEY.format(pk=pk): urls for pk, urls in loaded.items()
+        }
+        cache.set_many(fresh, LISTING_CACHE_TIMEOUT)
+        found.update(fresh)
+    for key, post in keys.items():
+        post.thumbnails = found[key]
+
+
+def forget_thumbnails(post_id):
+    cache.delete(THUMBNAILS_KEY.format(pk=post_id))
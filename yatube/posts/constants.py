@@ -1,3 +1,15 @@
 SYMBOOL_LIMIT = 15
 POST_QTY = 10
 RUNOUT = 20
+FANOUT_LIMIT = 1000
+FEED_BACKFILL = 500
+FEED_MAX_ENTRIES = 1000
+FEED_TRIM_EVERY = 50
+LISTING_CACHE_TIMEOUT = 60 * 15
+COMMENT_QTY = 20
+THUMBNAIL_SIZES = {
+    '960x339': (480, 960, 1440),
+}
+IMAGE_SIZES = '(min-width: 992px) 960px, 100vw'
+IMAGE_MAX_SIZE = (1920, 1920)
+IMAGE_QUALITY = 82
@@ -0,0 +1,206 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+
+from core.cache import get_or_recompute
+from .constants import (
+    FANOUT_LIMIT,
+    FEED_BACKFILL,
+    FEED_MAX_ENTRIES,
+    FEED_TRIM_EVERY,
+    RUNOUT,
+)
+from .models import FeedEntry, Follow, Post
+
+POPULAR_AUTHORS_KEY = 'feed:popular_authors'
+
+
+def is_popular(author_id):
+    """Автор с огромным числом подписчиков: его посты читаются на лету"""
+    followers = Follow.objects.filter(author_id=author_id)[:FANOUT_LIMIT]
+    return followers.count() >= FANOUT_LIMIT
+
+
+def popular_authors():
+    """Id авторов, для которых лента собирается при чтении (fan-out-on-read)"""
+    return get_or_recompute(
+        POPULAR_AUTHORS_KEY,
+        lambda: set(
+            Follow.objects.values('author_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gte=FANOUT_LIMIT)
+            .values_list('author_id', flat=True)
+        ),
+        RUNOUT,
+    )
+
+
+def forget_popular_authors():
+    """Подписки изменились: набор популярных авторов пересчитается"""
+    cache.delete(POPULAR_AUTHORS_KEY)
+
+
+def cap_feed(user_id):
+    """Оставляет в ленте не больше FEED_MAX_ENTRIES свежих записей"""
+    stale = (
+        FeedEntry.objects.filter(user_id=user_id)
+        .order_by('-pub_date', '-post_id')
+        .values('id')[FEED_MAX_ENTRIES:]
+    )
+    FeedEntry.objects.filter(id__in=stale).delete()
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора"""
+    if is_popular(post.author_id):
+        forget_popular_authors()
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ],
+        ignore_conflicts=True,
+    )
+    # каждая лента подрезается примерно раз в FEED_TRIM_EVERY постов
+    for user_id in follower_ids:
+        if (user_id + post.id) % FEED_TRIM_EVERY == 0:
+            cap_feed(user_id)
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки"""
+    if is_popular(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    )[:FEED_BACKFILL]
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+    cap_feed(user_id)
+
+
+def restore_fan_out(author_id):
+    """Автор выпал из популярных: посты снова раскладываются по лентам"""
+    followers = Follow.objects.filter(author_id=author_id)[:FANOUT_LIMIT]
+    if followers.count() != FANOUT_LIMIT - 1:
+        return
+    quote = connection.ops.quote_name
+    sql = (
+        f'{connection.ops.insert_statement(ignore_conflicts=True)} '
+        f'{quote(FeedEntry._meta.db_table)} (user_id, post_id, pub_date) '
+        f'SELECT f.user_id, p.id, p.pub_date '
+        f'FROM {quote(Follow._meta.db_table)} f CROSS JOIN ('
+        f'SELECT id, pub_date FROM {quote(Post._meta.db_table)} '
+        f'WHERE author_id = %s ORDER BY pub_date DESC LIMIT %s) p '
+        f'WHERE f.author_id = %s'
+        f'{connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (author_id, FEED_BACKFILL, author_id))
+
+
+def trim_feed(user_id, author_id):
+    """Убирает из ленты посты автора после отписки"""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def _on_entries(node):
+    """Условие курсора по полям поста в терминах FeedEntry"""
+    if not isinstance(node, Q):
+        lookup, value = node
+        if lookup == 'pk' or lookup.startswith('pk__'):
+            lookup = 'post_id' + lookup[2:]
+        return lookup, value
+    entries = Q()
+    entries.connector = node.connector
+    entries.negated = node.negated
+    entries.children = [_on_entries(child) for child in node.children]
+    return entries
+
+
+class FollowFeed:
+    """Лента подписок для CursorPaginator: FeedEntry и популярные авторы"""
+
+    def __init__(self, user, ordering=('-pub_date', '-pk'), condition=None):
+        self.user = user
+        self.ordering = ordering
+        self.condition = condition
+
+    def order_by(self, *ordering):
+        return FollowFeed(self.user, ordering, self.condition)
+
+    def filter(self, condition):
+        if self.condition is not None:
+            condition &= self.condition
+        return FollowFeed(self.user, self.ordering, condition)
+
+    def reverse(self):
+        ordering = tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+        return FollowFeed(self.user, ordering, self.condition)
+
+    def _keys(self, queryset, ordering, condition, fields, limit):
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        return queryset.order_by(*ordering).values_list(*fields)[:limit]
+
+    def __getitem__(self, page):
+        # CursorPaginator берёт только срезы [:limit]
+        limit = page.stop
+        entry_ordering = [
+            field.replace('pk', 'post_id') for field in self.ordering
+        ]
+        entry_condition = (
+            None if self.condition is None else _on_entries(self.condition)
+        )
+        found = dict(
+            self._keys(
+                FeedEntry.objects.filter(user=self.user),
+                entry_ordering,
+                entry_condition,
+                ('post_id', 'pub_date'),
+                limit,
+            )
+        )
+        popular = popular_authors()
+        if popular:
+            # индекс (author, pub_date) отдаёт каждому автору свой LIMIT
+            for author_id in Follow.objects.filter(
+                user=self.user, author_id__in=popular
+            ).values_list('author_id', flat=True):
+                found.update(
+                    self._keys(
+                        Post.objects.filter(author_id=author_id),
+                        self.ordering,
+                        self.condition,
+                        ('id', 'pub_date'),
+                        limit,
+                    )
+                )
+        keys = sorted(
+            found,
+            key=lambda post_id: (found[post_id], post_id),
+            reverse=self.ordering[0].startswith('-'),
+        )[:limit]
+        posts = Post.objects.select_related('author', 'group').in_bulk(keys)
+        return [posts[post_id] for post_id in keys if post_id in posts]
+
+
+def follow_feed(user):
+    """Лента подписок: записи FeedEntry и посты популярных авторов"""
+    return FollowFeed(user)
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
 
+from .images import normalize_image
 from .models import Comment, Post
 
 
@@ -8,6 +11,26 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        """Новая картинка пережимается, размеры сохраняются в посте"""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            try:
+                image, width, height = normalize_image(image)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                raise forms.ValidationError(
+                    'Не удалось прочитать картинку: файл повреждён '
+                    'или слишком большой'
+                )
+            self.instance.image_width = width
+            self.instance.image_height = height
+            self.instance.image_bytes = image.size
+        elif not image:
+            self.instance.image_width = None
+            self.instance.image_height = None
+            self.instance.image_bytes = None
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
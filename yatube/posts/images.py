@@ -0,0 +1,99 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, features
+
+from .constants import IMAGE_MAX_SIZE, IMAGE_QUALITY
+
+WEBP = features.check('webp')
+DERIVATIVE_FORMATS = (('jpg', 'JPEG'),)
+if WEBP:
+    DERIVATIVE_FORMATS += (('webp', 'WEBP'),)
+
+
+def normalize_image(upload):
+    """Пережимает загрузку без EXIF; вернёт (файл, ширина, высота)"""
+    upload.seek(0)
+    with Image.open(upload) as image:
+        # JPEG сразу декодируется в уменьшенном масштабе
+        image.draft('RGB', IMAGE_MAX_SIZE)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(IMAGE_MAX_SIZE, Image.LANCZOS)
+        image = flatten(image, keep_alpha=WEBP)
+    ext, image_format = DERIVATIVE_FORMATS[-1]
+    data = encode(image, image_format)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    normalized = SimpleUploadedFile(
+        f'{stem}.{ext}', data, f'image/{image_format.lower()}'
+    )
+    return normalized, image.width, image.height
+
+
+def make_derivatives(source, geometry, widths):
+    """Копии всех ширин с хэшем в имени: {ext: [(ширина, имя), ...]}"""
+    base_width, base_height = map(int, geometry.split('x'))
+    with default_storage.open(source) as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    widths = [w for w in widths if w <= image.width] or [min(widths)]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    derivatives = {}
+    for ext, image_format in DERIVATIVE_FORMATS:
+        flat = flatten(image, keep_alpha=image_format == 'WEBP')
+        derivatives[ext] = []
+        for width in widths:
+            size = (width, round(width * base_height / base_width))
+            resized = ImageOps.fit(flat, size, Image.LANCZOS)
+            data = encode(resized, image_format)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            name = os.path.join(
+                settings.THUMBNAIL_DERIVATIVES_DIR,
+                f'{stem}-{width}w.{digest}.{ext}',
+            )
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(data))
+            derivatives[ext].append((width, name))
+    return derivatives
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=IMAGE_QUALITY, method=4)
+    else:
+        image.save(
+            buffer,
+            'JPEG',
+            quality=IMAGE_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    return buffer.getvalue()
+
+
+def build_srcset(derivatives):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w' for width, name in derivatives
+    )
+
+
+def flatten(image, keep_alpha):
+    """Копия в RGB(A); для JPEG прозрачное ложится на белый"""
+    if image.mode in ('RGB', 'RGBA') and (keep_alpha or image.mode == 'RGB'):
+        return image
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    if not has_alpha:
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    if keep_alpha:
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
@@ -0,0 +1,88 @@
+import sqlite3
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Post
+
+LIKE = 'like'
+UNLIKE = 'unlike'
+TOGGLE = 'toggle'
+ACTIONS = (LIKE, UNLIKE, TOGGLE)
+
+Like = Post.likes.through
+
+
+def insert_like(post_id, user_id):
+    """Вставляет лайк, если его нет и пост существует"""
+    table = connection.ops.quote_name(Like._meta.db_table)
+    posts = connection.ops.quote_name(Post._meta.db_table)
+    sql = (
+        f'{connection.ops.insert_statement(ignore_conflicts=True)} '
+        f'{table} (post_id, user_id) '
+        f'SELECT %s, %s WHERE EXISTS (SELECT 1 FROM {posts} WHERE id = %s)'
+        f'{connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (post_id, user_id, post_id))
+        return cursor.rowcount
+
+
+def can_return_from_update():
+    if connection.vendor == 'postgresql':
+        return True
+    return (
+        connection.vendor == 'sqlite'
+        and sqlite3.sqlite_version_info >= (3, 35)
+    )
+
+
+def change_likes_count(post_id, delta):
+    """Новый likes_count (None без поста), по возможности одним запросом"""
+    # разъехавшийся счётчик не уходит ниже нуля и не роняет unlike
+    if delta and can_return_from_update():
+        posts = connection.ops.quote_name(Post._meta.db_table)
+        greatest = 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {posts} '
+                f'SET likes_count = {greatest}(likes_count + %s, 0) '
+                f'WHERE id = %s RETURNING likes_count',
+                (delta, post_id),
+            )
+            row = cursor.fetchone()
+        return row and row[0]
+    if delta:
+        Post.objects.filter(id=post_id).update(
+            likes_count=Greatest(F('likes_count') + delta, 0)
+        )
+    return (
+        Post.objects.filter(id=post_id)
+        .values_list('likes_count', flat=True)
+        .first()
+    )
+
+
+def set_like(post_id, user_id, action=TOGGLE):
+    """Лайк одной транзакцией; вернёт (liked, likes_count) или None"""
+    with transaction.atomic():
+        delta = 0
+        if action in (UNLIKE, TOGGLE):
+            delta = -Like.objects.filter(
+                post_id=post_id, user_id=user_id
+            ).delete()[0]
+        if action == LIKE or (action == TOGGLE and not delta):
+            delta = insert_like(post_id, user_id)
+        likes_count = change_likes_count(post_id, delta)
+        if delta:
+            liked = delta > 0
+        else:
+            # ничего не поменялось: при гонке toggle лайк мог вставить
+            # соседний запрос, поэтому состояние читается из таблицы
+            liked = Like.objects.filter(
+                post_id=post_id, user_id=user_id
+            ).exists()
+    if likes_count is None:
+        return None
+    return liked, likes_count
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from posts.benchmark import compare, run_benchmark
+from posts.synthetic import DATASETS, SyntheticData
+
+BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические наборы данных во временной базе и меряет '
+        'задержку, число запросов и пик памяти вью posts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='tiny,small',
+            help=f'Наборы через запятую: {", ".join(DATASETS)}',
+        )
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Не очищать кэш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--save', nargs='?', const=BASELINE_PATH, help='Сохранить замер'
+        )
+        parser.add_argument(
+            '--compare',
+            nargs='?',
+            const=BASELINE_PATH,
+            help='Сравнить с базовым замером',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Допустимый рост p50 (доля)',
+        )
+
+    def handle(self, *args, **options):
+        sizes = options['sizes'].split(',')
+        unknown = set(sizes) - set(DATASETS)
+        if unknown:
+            raise CommandError(f'Неизвестные наборы: {", ".join(unknown)}')
+        results = {}
+        setup_test_environment(debug=False)
+        try:
+            for size in sizes:
+                results[size] = self.run_size(size, options)
+                self.report(size, results[size])
+        finally:
+            teardown_test_environment()
+        if options['save']:
+            os.makedirs(os.path.dirname(options['save']), exist_ok=True)
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Замер сохранён в {options["save"]}')
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                regressions = compare(
+                    results, json.load(file), options['tolerance']
+                )
+            if regressions:
+                raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_size(self, size, options):
+        """Отдельная временная база и MEDIA_ROOT на каждый набор"""
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media, override_settings(
+                MEDIA_ROOT=media, THUMBNAIL_WORKERS=0
+            ):
+                cache.clear()
+                SyntheticData(size, seed=options['seed']).generate()
+                return run_benchmark(options['requests'], options['warm'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def report(self, size, views):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Набор {size}:'))
+        self.stdout.write(
+            f'{"вью":<14}{"p50, мс":>9}{"p90, мс":>9}{"p99, мс":>9}'
+            f'{"запросов":>10}{"пик, КБ":>9}'
+        )
+        for view, metrics in views.items():
+            self.stdout.write(
+                f'{view:<14}{metrics["p50_ms"]:>9}{metrics["p90_ms"]:>9}'
+                f'{metrics["p99_ms"]:>9}{metrics["queries"]:>10}'
+                f'{metrics["peak_kb"]:>9}'
+            )
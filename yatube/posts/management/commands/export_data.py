@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.bulk import (
+    BATCH_SIZE,
+    FORMATS,
+    KINDS,
+    export_rows,
+    guess_format,
+    write_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии, подписки или лайки в NDJSON/CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument(
+            'path', nargs='?', default='-', help='Файл (по умолчанию stdout)'
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        rows = export_rows(options['kind'], options['batch_size'])
+        if path == '-':
+            count = write_rows(rows, options['kind'], fmt, self.stdout)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = write_rows(rows, options['kind'], fmt, stream)
+        self.stderr.write(f'Выгружено записей: {count}')
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.bulk import (
+    BATCH_SIZE,
+    FORMATS,
+    KINDS,
+    Importer,
+    guess_format,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты, комментарии, подписки или лайки из NDJSON/CSV '
+        'пачками через bulk_create. Порядок для переноса базы: '
+        'posts, comments, likes, follows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument(
+            'path', nargs='?', default='-', help='Файл (по умолчанию stdin)'
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        importer = Importer(options['batch_size'])
+        if path == '-':
+            rows = read_rows(sys.stdin, fmt)
+            imported, skipped = importer.run(options['kind'], rows)
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                rows = read_rows(stream, fmt)
+                imported, skipped = importer.run(options['kind'], rows)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Записано: {imported}, пропущено: {skipped}'
+            )
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ThumbnailJob
+from posts.thumbnails import job_counts, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задания на миниатюры, оставшиеся в очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Повторить и задания, завершившиеся ошибкой',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            ThumbnailJob.objects.filter(status=ThumbnailJob.FAILED).update(
+                status=ThumbnailJob.PENDING, error=''
+            )
+        run_pending_jobs()
+        counts = job_counts()
+        self.stdout.write(
+            f'Готово: {counts.get(ThumbnailJob.DONE, 0)}, '
+            f'с ошибкой: {counts.get(ThumbnailJob.FAILED, 0)}'
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов (FTS5)'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError('Индекс FTS5 поддерживается только в SQLite')
+        indexed = rebuild_index()
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
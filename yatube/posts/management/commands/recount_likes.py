@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from posts.models import Post
+from posts.utils import actual_likes_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.likes_count по таблице лайков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать число постов с расхождением',
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            Post.objects.annotate(actual=actual_likes_count())
+            .exclude(likes_count=F('actual'))
+            .count()
+        )
+        if options['dry_run']:
+            self.stdout.write(f'Постов с расхождением: {drifted}')
+            return
+        with transaction.atomic():
+            Post.objects.update(likes_count=actual_likes_count())
+        self.stdout.write(
+            self.style.SUCCESS(f'Счётчики исправлены у {drifted} постов')
+        )
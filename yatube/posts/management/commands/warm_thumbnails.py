@@ -0,0 +1,60 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts.constants import THUMBNAIL_SIZES
+from posts.models import Post, ThumbnailJob
+from posts.thumbnails import job_counts, job_files, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие миниатюры для всех постов с картинками '
+        'и проверяет, что готовые файлы есть в хранилище'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Проверить файлы готовых миниатюр и пересоздать пропавшие',
+        )
+
+    def handle(self, *args, **options):
+        created = self.create_missing_jobs()
+        missing = self.verify_files() if options['verify'] else 0
+        executed = run_pending_jobs()
+        failed = job_counts().get(ThumbnailJob.FAILED, 0)
+        self.stdout.write(
+            f'Новых заданий: {created}, пропавших файлов: {missing}, '
+            f'выполнено: {executed}, с ошибкой: {failed}'
+        )
+
+    def create_missing_jobs(self):
+        existing = set(
+            ThumbnailJob.objects.values_list('post_id', 'geometry')
+        )
+        posts = (
+            Post.objects.exclude(image='')
+            .values_list('id', 'image')
+            .iterator()
+        )
+        jobs = [
+            ThumbnailJob(post_id=post_id, geometry=geometry, source=image)
+            for post_id, image in posts
+            for geometry in THUMBNAIL_SIZES
+            if (post_id, geometry) not in existing
+        ]
+        ThumbnailJob.objects.bulk_create(jobs, batch_size=500)
+        return len(jobs)
+
+    def verify_files(self):
+        """Возвращает готовые задания с пропавшим файлом в очередь"""
+        missing = 0
+        jobs = ThumbnailJob.objects.filter(status=ThumbnailJob.DONE)
+        for job in jobs.iterator():
+            if all(default_storage.exists(name) for name in job_files(job)):
+                continue
+            job.status, job.url = ThumbnailJob.PENDING, ''
+            job.save(update_fields=('status', 'url', 'updated'))
+            missing += 1
+        return missing
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_likes_count(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    likes = (
+        Post.likes.through.objects.filter(post_id=OuterRef('pk'))
+        .values('post_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Post.objects.update(likes_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_alter_post_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество лайков'),
+        ),
+        migrations.RunPython(fill_likes_count, migrations.RunPython.noop),
+    ]
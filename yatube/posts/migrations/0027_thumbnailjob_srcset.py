@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_post_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thumbnailjob',
+            name='srcset',
+            field=models.TextField(blank=True, verbose_name='JPEG srcset'),
+        ),
+        migrations.AddField(
+            model_name='thumbnailjob',
+            name='webp_srcset',
+            field=models.TextField(blank=True, verbose_name='WebP srcset'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+CREATE = """
+    CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+        text, group_title, author,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+FILL = """
+    INSERT INTO posts_post_fts (rowid, text, group_title, author)
+    SELECT p.id, p.text, COALESCE(g.title, ''),
+           u.username || ' ' || u.first_name || ' ' || u.last_name
+    FROM posts_post p
+    JOIN auth_user u ON u.id = p.author_id
+    LEFT JOIN posts_group g ON g.id = p.group_id
+"""
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(CREATE)
+        schema_editor.execute(FILL)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_thumbnailjob_srcset'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
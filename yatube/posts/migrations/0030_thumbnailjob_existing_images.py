@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 12:30
+
+from django.db import migrations
+
+# размеры миниатюр на момент миграции
+GEOMETRIES = ('960x339',)
+
+
+def enqueue_existing_images(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    ThumbnailJob = apps.get_model('posts', 'ThumbnailJob')
+    posts = Post.objects.exclude(image='').values_list('id', 'image')
+    ThumbnailJob.objects.bulk_create(
+        (
+            ThumbnailJob(post_id=post_id, geometry=geometry, source=image)
+            for post_id, image in posts.iterator()
+            for geometry in GEOMETRIES
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_feedentry_pub_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_existing_images, migrations.RunPython.noop),
+    ]
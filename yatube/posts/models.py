@@ -55,11 +55,25 @@ class Post(AbstractModel):
         upload_to='posts/',
         blank=True,
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False
+    )
+    image_bytes = models.PositiveIntegerField(
+        'Размер картинки, байт', null=True, blank=True, editable=False
+    )
     # like = models.IntegerField(verbose_name='Количество лайков', default=0)
     likes = models.ManyToManyField(User, related_name='post_likes')
+    likes_count = models.PositiveIntegerField(
+        verbose_name='Количество лайков',
+        default=0,
+        editable=False,
+    )
 
     def number_of_likes(self):
-        return self.likes.count()
+        return self.likes_count
 
     def __str__(self):
         return self.text[:SYMBOOL_LIMIT]
@@ -68,6 +82,15 @@ class Post(AbstractModel):
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(AbstractModel):
@@ -93,6 +116,11 @@ class Comment(AbstractModel):
     class Meta:
         verbose_name = 'Коммент'
         verbose_name_plural = 'Комменты'
+        indexes = [
+            models.Index(
+                fields=['post', 'pub_date'], name='comment_post_pub_date_idx'
+            )
+        ]
 
 
 class Follow(models.Model):
@@ -123,3 +151,90 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_subscription'
             )
         ]
+
+
+class FeedEntry(models.Model):
+    """Материализованная лента подписок: пост автора у каждого подписчика"""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации поста')
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='feed_user_pub_date_idx',
+            )
+        ]
+
+
+class ThumbnailJob(models.Model):
+    """Задание на фоновую генерацию миниатюры картинки поста"""
+
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    FINISHED = (DONE, FAILED)
+
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='thumbnail_jobs',
+    )
+    geometry = models.CharField(verbose_name='Размер', max_length=20)
+    source = models.CharField(verbose_name='Исходная картинка', max_length=255)
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    url = models.CharField(
+        verbose_name='Адрес миниатюры', max_length=255, blank=True
+    )
+    srcset = models.TextField(verbose_name='JPEG srcset', blank=True)
+    webp_srcset = models.TextField(verbose_name='WebP srcset', blank=True)
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    updated = models.DateTimeField(verbose_name='Обновлено', auto_now=True)
+
+    def __str__(self):
+        return f'{self.geometry} для поста {self.post_id}: {self.status}'
+
+    class Meta:
+        verbose_name = 'Миниатюра'
+        verbose_name_plural = 'Миниатюры'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'geometry'], name='unique_thumbnail_job'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['status'], name='thumbnail_job_status_idx')
+        ]
@@ -1,7 +1,113 @@
+import base64
+import binascii
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_PARAM = 'cursor'
+ORDER_PARAM = 'order'
+NEWEST = 'newest'
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def encode_cursor(obj, direction):
+    """Упаковывает (pub_date, id) граничного объекта в токен"""
+    raw = f'{direction}|{obj.pub_date.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Вернёт (направление, pub_date, id) или None для битого токена"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, pub_date, pk = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по курсору (pub_date, id) без COUNT и OFFSET"""
+
+    keyset = True
+
+    def __init__(self, object_list, per_page, oldest_first=False):
+        self.oldest_first = oldest_first
+        ordering = ('pub_date', 'pk') if oldest_first else ('-pub_date', '-pk')
+        super().__init__(object_list.order_by(*ordering), per_page)
+
+    def _after(self, pub_date, pk):
+        if self.oldest_first:
+            return Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+
+    def _before(self, pub_date, pk):
+        if self.oldest_first:
+            return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        return Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+
+    def get_page(self, cursor):
+        decoded = decode_cursor(cursor)
+        limit = self.per_page + 1
+        if decoded is None:
+            items = list(self.object_list[:limit])
+            has_more, has_previous = len(items) > self.per_page, False
+            items = items[:self.per_page]
+        elif decoded[0] == FORWARD:
+            _, pub_date, pk = decoded
+            items = list(
+                self.object_list.filter(self._after(pub_date, pk))[:limit]
+            )
+            has_more, has_previous = len(items) > self.per_page, True
+            items = items[:self.per_page]
+        else:
+            _, pub_date, pk = decoded
+            items = list(
+                self.object_list.filter(self._before(pub_date, pk))
+                .reverse()[:limit]
+            )
+            has_previous, has_more = len(items) > self.per_page, True
+            items = items[:self.per_page][::-1]
+
+        page = self._get_page(items, None, self)
+        page.next_cursor = (
+            encode_cursor(items[-1], FORWARD) if has_more and items else None
+        )
+        page.previous_cursor = (
+            encode_cursor(items[0], BACKWARD)
+            if has_previous and items
+            else None
+        )
+        return page
+
+
+def paginate_page(request, post_list, post_qty, numbered=False):
+    """Страница ленты по курсору, с numbered=True – по номеру ?page"""
+    if numbered:
+        page_number = request.GET.get('page')
+        page = Paginator(post_list, post_qty).get_page(page_number)
+        page.next_cursor = page.previous_cursor = None
+        return page
+    return CursorPaginator(post_list, post_qty).get_page(
+        request.GET.get(CURSOR_PARAM)
+    )
 
 
-def paginate_page(request, post_list, post_qty):
-    """Creates definite page number with 10 posts by default"""
-    page_number = request.GET.get('page')
-    return Paginator(post_list, post_qty).get_page(page_number)
+def paginate_comments(request, comment_list, comment_qty):
+    """Комментарии по курсору: сначала старые, если не ?order=newest"""
+    newest_first = request.GET.get(ORDER_PARAM) == NEWEST
+    page = CursorPaginator(
+        comment_list, comment_qty, oldest_first=not newest_first
+    ).get_page(request.GET.get(CURSOR_PARAM))
+    page.order = NEWEST if newest_first else ''
+    return page
@@ -0,0 +1,172 @@
+import re
+
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# Веса колонок для bm25: текст, группа, автор
+FTS_WEIGHTS = (10.0, 3.0, 2.0)
+SNIPPET_TOKENS = 24
+_MARK_START, _MARK_END = '\x02', '\x03'
+_WORD = re.compile(r'\w+')
+
+_SELECT_DOCUMENTS = f"""
+    INSERT INTO {FTS_TABLE} (rowid, text, group_title, author)
+    SELECT p.id, p.text, COALESCE(g.title, ''),
+           u.username || ' ' || u.first_name || ' ' || u.last_name
+    FROM posts_post p
+    JOIN auth_user u ON u.id = p.author_id
+    LEFT JOIN posts_group g ON g.id = p.group_id
+"""
+
+
+def fts_enabled():
+    """Индекс FTS5 есть только в SQLite, в других базах – обычный поиск"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """Запрос FTS5 из ввода: каждое слово – префикс в кавычках"""
+    return ' '.join(f'"{word}"*' for word in _WORD.findall(query.lower()))
+
+
+def _reindex(where, params):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'(SELECT p.id FROM posts_post p WHERE {where})',
+            params,
+        )
+        cursor.execute(f'{_SELECT_DOCUMENTS} WHERE {where}', params)
+
+
+def index_post(post_id):
+    _reindex('p.id = %s', [post_id])
+
+
+def index_group_posts(group_id):
+    _reindex('p.group_id = %s', [group_id])
+
+
+def index_author_posts(author_id):
+    _reindex('p.author_id = %s', [author_id])
+
+
+def unindex_post(post_id):
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def unindex_group(title):
+    """Посты удалённой группы остались без неё – переиндексируем их"""
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE group_title = %s',
+                [title],
+            )
+            post_ids = [row[0] for row in cursor.fetchall()]
+        for post_id in post_ids:
+            index_post(post_id)
+
+
+def rebuild_index():
+    """Заполняет индекс заново по всем постам, возвращает их число"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(_SELECT_DOCUMENTS)
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def matching_ids(match):
+    """Подзапрос id постов, подходящих под запрос (для фильтра pk__in)"""
+    return (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,),
+    )
+
+
+def highlight(raw):
+    return mark_safe(
+        escape(raw)
+        .replace(_MARK_START, '<mark>')
+        .replace(_MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Результаты поиска для Paginator: счёт и срезы по индексу FTS"""
+
+    def __init__(self, query):
+        self.words = _WORD.findall(query.lower())
+        self.match = build_match(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        if not fts_enabled():
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def _fallback(self):
+        posts = Post.objects.select_related('author', 'group')
+        for word in self.words:
+            posts = posts.filter(text__icontains=word)
+        return posts
+
+    def __getitem__(self, page):
+        if not self.match:
+            return []
+        if not fts_enabled():
+            posts = list(self._fallback()[page])
+            for post in posts:
+                post.snippet = escape(post.text)
+            return posts
+        weights = ', '.join(map(str, FTS_WEIGHTS))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT rowid,
+                       snippet({FTS_TABLE}, 0, %s, %s, '…', %s)
+                FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s
+                ORDER BY bm25({FTS_TABLE}, {weights})
+                LIMIT %s OFFSET %s
+                """,
+                [
+                    _MARK_START,
+                    _MARK_END,
+                    SNIPPET_TOKENS,
+                    self.match,
+                    page.stop - page.start,
+                    page.start,
+                ],
+            )
+            ranked = cursor.fetchall()
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post_id for post_id, _ in ranked]
+        )
+        results = []
+        for post_id, snippet in ranked:
+            post = posts.get(post_id)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
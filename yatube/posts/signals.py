@@ -0,0 +1,126 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .cache import (
+    bump_card_version,
+    bump_listing_generation,
+    bump_post_listings,
+)
+from .feed import (
+    backfill_feed,
+    fan_out_post,
+    forget_popular_authors,
+    restore_fan_out,
+    trim_feed,
+)
+from .models import Follow, Group, Post, User
+from .search import (
+    index_author_posts,
+    index_group_posts,
+    index_post,
+    unindex_group,
+    unindex_post,
+)
+from .utils import actual_likes_count
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance.previous_group_ids = list(
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        fan_out_post(instance)
+    else:
+        bump_card_version('post', instance.id)
+    bump_post_listings(
+        instance, getattr(instance, 'previous_group_ids', ())
+    )
+    index_post(instance.id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_post_listings(instance)
+    unindex_post(instance.id)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        bump_card_version('group', instance.id)
+        bump_listing_generation('group', instance.slug)
+        index_group_posts(instance.id)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    unindex_group(instance.title)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    bump_card_version('user', instance.id)
+    bump_listing_generation('profile', instance.username)
+    index_author_posts(instance.id)
+
+
+def bump_follow_profiles(follow):
+    """Счётчики подписок на страницах обоих профилей изменились"""
+    for username in User.objects.filter(
+        id__in=(follow.user_id, follow.author_id)
+    ).values_list('username', flat=True):
+        bump_listing_generation('profile', username)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        forget_popular_authors()
+        backfill_feed(instance.user_id, instance.author_id)
+        bump_follow_profiles(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    forget_popular_authors()
+    trim_feed(instance.user_id, instance.author_id)
+    restore_fan_out(instance.author_id)
+    bump_follow_profiles(instance)
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Лайки меняли через ORM (админка, shell): пересчитываем счётчик"""
+    if action == 'pre_clear' and reverse:
+        instance.cleared_like_post_ids = list(
+            instance.post_likes.values_list('id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == 'post_clear':
+        post_ids = instance.__dict__.pop('cleared_like_post_ids', [])
+    else:
+        post_ids = pk_set
+    Post.objects.filter(id__in=post_ids).update(
+        likes_count=actual_likes_count()
+    )
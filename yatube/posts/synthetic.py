@@ -0,0 +1,163 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from .bulk import Importer
+from .models import Post
+
+# Размеры наборов данных для генератора и бенчмарка
+DATASETS = {
+    'tiny': {
+        'users': 20,
+        'groups': 3,
+        'posts': 60,
+        'comments': 120,
+        'likes': 200,
+        'follows': 60,
+        'images': 2,
+    },
+    'small': {
+        'users': 200,
+        'groups': 10,
+        'posts': 2000,
+        'comments': 5000,
+        'likes': 10000,
+        'follows': 2000,
+        'images': 5,
+    },
+    'medium': {
+        'users': 2000,
+        'groups': 50,
+        'posts': 20000,
+        'comments': 50000,
+        'likes': 100000,
+        'follows': 20000,
+        'images': 10,
+    },
+    'large': {
+        'users': 20000,
+        'groups': 200,
+        'posts': 200000,
+        'comments': 500000,
+        'likes': 1000000,
+        'follows': 200000,
+        'images': 20,
+    },
+}
+# Показатель степенного закона: немногие авторы и посты собирают
+# большую часть подписок и лайков
+ZIPF_EXPONENT = 1.1
+IMAGE_RATIO = 0.2
+WORDS = (
+    'пост лента группа автор подписка лайк комментарий картинка текст '
+    'новость история вечер утро город дорога книга музыка кино проект '
+    'работа отпуск море горы друзья семья код django python база кэш'
+).split()
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def username(number):
+    return f'user{number:06d}'
+
+
+class SyntheticData:
+    """Набор данных из seed с Zipf-популярностью через Importer"""
+
+    def __init__(self, size, seed=0, batch_size=1000):
+        self.spec = DATASETS[size]
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        self.users = range(self.spec['users'])
+        self.user_weights = list(accumulate(zipf_weights(len(self.users))))
+        self.post_weights = zipf_weights(self.spec['posts'])
+
+    def generate(self):
+        images = self.make_images()
+        importer = Importer(self.batch_size)
+        importer.user_ids(username(n) for n in range(self.spec['users']))
+        first_id = (Post.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        post_ids = list(range(first_id, first_id + self.spec['posts']))
+        importer.run('posts', self.posts(post_ids, images))
+        # популярность поста не зависит от его возраста
+        self.random.shuffle(post_ids)
+        importer.run('comments', self.comments(post_ids))
+        importer.run('likes', self.likes(post_ids))
+        importer.run('follows', self.follows())
+        return self.spec
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def author(self):
+        return username(
+            self.random.choices(self.users, cum_weights=self.user_weights)[0]
+        )
+
+    def make_images(self):
+        names = []
+        for number in range(self.spec['images']):
+            buffer = BytesIO()
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(
+                default_storage.save(
+                    f'posts/synthetic-{number}.jpg',
+                    ContentFile(buffer.getvalue()),
+                )
+            )
+        return names
+
+    def posts(self, post_ids, images):
+        for post_id in post_ids:
+            group = self.random.randrange(self.spec['groups'] + 1)
+            with_image = images and self.random.random() < IMAGE_RATIO
+            yield {
+                'id': post_id,
+                'author': self.author(),
+                'group': f'group-{group}' if group else '',
+                'text': self.text(self.random.randint(5, 80)),
+                'pub_date': (
+                    self.now - timedelta(minutes=post_ids[-1] - post_id)
+                ).isoformat(),
+                'image': self.random.choice(images) if with_image else '',
+            }
+
+    def popular_posts(self, post_ids, count):
+        return self.random.choices(
+            post_ids, weights=self.post_weights, k=count
+        )
+
+    def comments(self, post_ids):
+        for post_id in self.popular_posts(post_ids, self.spec['comments']):
+            yield {
+                'post': post_id,
+                'author': self.author(),
+                'text': self.text(self.random.randint(3, 30)),
+                'pub_date': self.now.isoformat(),
+            }
+
+    def likes(self, post_ids):
+        for post_id in self.popular_posts(post_ids, self.spec['likes']):
+            yield {
+                'post': post_id,
+                'user': username(self.random.randrange(self.spec['users'])),
+            }
+
+    def follows(self):
+        for _ in range(self.spec['follows']):
+            yield {
+                'user': username(self.random.randrange(self.spec['users'])),
+                'author': self.author(),
+                'pub_date': self.now.isoformat(),
+            }
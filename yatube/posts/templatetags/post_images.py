@@ -0,0 +1,36 @@
+from django import template
+
+from ..cache import THUMBNAIL_FIELDS
+from ..constants import IMAGE_SIZES
+from ..models import ThumbnailJob
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/responsive_image.html')
+def responsive_image(post, geometry, css, sizes=IMAGE_SIZES):
+    """Картинка поста с srcset, заглушка в очереди или оригинал"""
+    if not post.image:
+        return {}
+    if hasattr(post, 'thumbnails'):
+        image = post.thumbnails.get(geometry)
+    else:
+        image = (
+            ThumbnailJob.objects.filter(
+                post_id=post.id,
+                geometry=geometry,
+                status__in=ThumbnailJob.FINISHED,
+            )
+            .values(*THUMBNAIL_FIELDS)
+            .first()
+        )
+    if image and image.get('status') == ThumbnailJob.FAILED:
+        image = {'url': post.image.url}
+    width, height = geometry.split('x')
+    return {
+        'image': image,
+        'sizes': sizes,
+        'width': width,
+        'height': height,
+        'css': css,
+    }
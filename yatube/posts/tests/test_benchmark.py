@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import TestCase, override_settings
+
+from posts.benchmark import compare, run_benchmark
+from posts.models import Post, User
+from posts.synthetic import DATASETS, SyntheticData
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SyntheticData('tiny').generate()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dataset_has_power_law_followers(self):
+        """Синтетический набор нужного размера, подписки у немногих"""
+        spec = DATASETS['tiny']
+        self.assertEqual(Post.objects.count(), spec['posts'])
+        followers = sorted(
+            User.objects.annotate(n=Count('following')).values_list(
+                'n', flat=True
+            ),
+            reverse=True,
+        )
+        self.assertGreater(followers[0], 4 * followers[len(followers) // 2])
+
+    def test_benchmark_reports_every_view(self):
+        """Замер возвращает перцентили, запросы и память для всех вью"""
+        results = run_benchmark(requests=2)
+        self.assertEqual(
+            set(results),
+            {
+                'index',
+                'group_posts',
+                'profile',
+                'post_detail',
+                'follow_index',
+                'PostLike',
+            },
+        )
+        for view, metrics in results.items():
+            with self.subTest(view=view):
+                self.assertGreater(metrics['queries'], 0)
+                self.assertGreater(metrics['peak_kb'], 0)
+                self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+
+    def test_compare_flags_regressions(self):
+        """Сравнение с базой ловит рост запросов и задержки"""
+        base = {'tiny': {'index': {'p50_ms': 10.0, 'queries': 5}}}
+        current = {'tiny': {'index': {'p50_ms': 20.0, 'queries': 7}}}
+        self.assertEqual(len(compare(current, base, 0.25)), 2)
+        self.assertEqual(compare(base, base, 0.25), [])
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.constants import THUMBNAIL_SIZES
+from posts.models import (
+    Comment,
+    FeedEntry,
+    Follow,
+    Group,
+    Post,
+    ThumbnailJob,
+    User,
+)
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class BulkImportExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='bulk', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Первый', author=cls.author, group=cls.group
+        )
+        Post.objects.create(text='Второй', author=cls.author)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        cls.post.likes.add(cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, kind, ext):
+        path = os.path.join(TEMP_DIR, f'{kind}.{ext}')
+        call_command('export_data', kind, path, stderr=StringIO())
+        return path
+
+    def test_round_trip_restores_data(self):
+        """Выгрузка и загрузка обратно восстанавливают посты и связи"""
+        for ext in ('ndjson', 'csv'):
+            with self.subTest(format=ext):
+                paths = {
+                    kind: self.export(kind, ext)
+                    for kind in ('posts', 'comments', 'likes', 'follows')
+                }
+                pub_dates = dict(Post.objects.values_list('id', 'pub_date'))
+                Post.objects.all().delete()
+                Follow.objects.all().delete()
+                for kind, path in paths.items():
+                    call_command('import_data', kind, path, stdout=StringIO())
+                self.assertEqual(
+                    dict(Post.objects.values_list('id', 'pub_date')),
+                    pub_dates,
+                )
+                post = Post.objects.get(pk=BulkImportExportTest.post.pk)
+                self.assertEqual(post.group, BulkImportExportTest.group)
+                self.assertEqual(post.comments.count(), 1)
+                self.assertEqual(post.likes_count, 1)
+                self.assertEqual(
+                    FeedEntry.objects.filter(
+                        user=BulkImportExportTest.reader
+                    ).count(),
+                    2,
+                )
+
+    def test_import_creates_unknown_authors_and_groups(self):
+        """Неизвестные авторы и группы создаются пачкой при загрузке"""
+        path = os.path.join(TEMP_DIR, 'new.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"author": "newbie", "group": "fresh", "text": "Привет",'
+                ' "pub_date": "2020-01-01T10:00:00+00:00"}\n'
+            )
+        call_command('import_data', 'posts', path, stdout=StringIO())
+        post = Post.objects.get(text='Привет')
+        self.assertEqual(post.author.username, 'newbie')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.group.slug, 'fresh')
+        self.assertEqual(post.pub_date.year, 2020)
+
+    def test_existing_rows_are_counted_as_skipped(self):
+        """Строки, которые уже есть в базе, считаются пропущенными"""
+        for kind in ('posts', 'follows'):
+            with self.subTest(kind=kind):
+                path = self.export(kind, 'ndjson')
+                out = StringIO()
+                call_command('import_data', kind, path, stdout=out)
+                rows = Post.objects.count() if kind == 'posts' else 1
+                self.assertIn(
+                    f'Записано: 0, пропущено: {rows}', out.getvalue()
+                )
+
+    def test_import_does_not_count_tables(self):
+        """Записанные строки считаются без COUNT(*) по всей таблице"""
+        path = self.export('posts', 'ndjson')
+        Post.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_data', 'posts', path, stdout=StringIO())
+        self.assertFalse(
+            [
+                query for query in queries.captured_queries
+                if 'COUNT(*)' in query['sql']
+                and '"posts_post"' in query['sql']
+            ]
+        )
+
+    def test_imported_images_get_thumbnail_jobs(self):
+        """Картинки загруженных постов ставятся в очередь на миниатюры"""
+        path = os.path.join(TEMP_DIR, 'images.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"author": "author", "text": "С картинкой",'
+                ' "image": "posts/imported.jpg"}\n'
+            )
+        with mock.patch('posts.bulk.submit_pending_jobs') as submit:
+            call_command('import_data', 'posts', path, stdout=StringIO())
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual(
+            set(
+                ThumbnailJob.objects.filter(
+                    post=post, status=ThumbnailJob.PENDING
+                ).values_list('geometry', 'source')
+            ),
+            {(geometry, post.image.name) for geometry in THUMBNAIL_SIZES},
+        )
+        submit.assert_called_once()
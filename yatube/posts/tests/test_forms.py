@@ -1,4 +1,5 @@
 from http import HTTPStatus
+from io import BytesIO
 import shutil
 import tempfile
 
@@ -7,6 +8,9 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+
+from posts.constants import IMAGE_MAX_SIZE
 
 from posts.models import Comment, Group, Post, User
 
@@ -86,6 +90,51 @@ class PostFormCreateTests(TestCase):
         expected_image = Post.objects.get(id=2).image
         self.assertEqual(post_image, expected_image)
 
+    def test_uploaded_image_is_normalized(self):
+        """Картинка уменьшается, теряет EXIF и пережимается при загрузке"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        source = BytesIO()
+        Image.new('RGB', (4000, 1000), (200, 10, 10)).save(
+            source, 'JPEG', quality=100, exif=exif
+        )
+        uploaded = SimpleUploadedFile(
+            'photo.jpeg', source.getvalue(), content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Большое фото', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Большое фото')
+        self.assertEqual(
+            (post.image_width, post.image_height),
+            (IMAGE_MAX_SIZE[0], IMAGE_MAX_SIZE[0] // 4),
+        )
+        self.assertEqual(post.image_bytes, post.image.size)
+        self.assertLess(post.image_bytes, len(source.getvalue()))
+        with Image.open(post.image) as stored:
+            self.assertEqual(
+                stored.size, (post.image_width, post.image_height)
+            )
+            self.assertEqual(len(stored.getexif()), 0)
+
+    def test_truncated_image_is_form_error(self):
+        """Обрезанный JPEG – ошибка формы, а не 500"""
+        source = BytesIO()
+        Image.new('RGB', (400, 400), (200, 10, 10)).save(source, 'JPEG')
+        uploaded = SimpleUploadedFile(
+            'broken.jpeg',
+            source.getvalue()[:len(source.getvalue()) // 2],
+            content_type='image/jpeg',
+        )
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Битое фото', 'image': uploaded},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.filter(text='Битое фото').exists())
+
     def test_edit_post(self):
         """
         Валидная форма редактирует существующую запись в Post,
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.utils import sorts_in_temp_tree, unindexed_feed_queries
+
+
+class FeedQueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='plans', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.user, group=cls.group
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FeedQueryPlanTest.reader)
+        cache.clear()
+
+    def test_plan_checker_detects_sort_in_temp_tree(self):
+        """Проверка ловит сортировку во временном B-дереве"""
+        self.assertTrue(
+            sorts_in_temp_tree(
+                ['SCAN posts_post', 'USE TEMP B-TREE FOR ORDER BY']
+            )
+        )
+        self.assertTrue(
+            sorts_in_temp_tree(
+                [
+                    'SEARCH posts_post USING INTEGER PRIMARY KEY (rowid=?)',
+                    'USE TEMP B-TREE FOR ORDER BY',
+                ]
+            )
+        )
+        self.assertFalse(
+            sorts_in_temp_tree(['SCAN posts_post USING INDEX idx'])
+        )
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент и поста не сортируют всю таблицу постов"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'plans'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(unindexed_feed_queries(self.client, url), [])
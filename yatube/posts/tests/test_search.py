@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.admin import PostAdmin
+from posts.models import Group, Post, User
+from posts.search import FTS_TABLE
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Классика', slug='classics', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Все счастливые семьи похожи друг на друга',
+            author=cls.user,
+            group=cls.group,
+        )
+        Post.objects.create(
+            text='Счастливые часов не наблюдают, <b>а семьи</b> – редко',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def search(self, query):
+        return self.client.get(reverse('posts:search'), {'q': query})
+
+    def test_search_ranks_and_highlights(self):
+        """Поиск находит посты по словам и подсвечивает совпадения"""
+        response = self.search('счастливые семьи похожи')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 1)
+        self.assertEqual(page_obj[0], PostSearchTest.post)
+        self.assertContains(response, '<mark>похожи</mark>')
+
+    def test_snippet_escapes_post_html(self):
+        """Разметка из текста поста в сниппете экранируется"""
+        response = self.search('наблюдают')
+        self.assertContains(response, '&lt;b&gt;')
+        self.assertNotContains(response, '<b>а семьи</b>')
+
+    def test_search_by_group_and_author(self):
+        """Поиск учитывает название группы и имя автора"""
+        for query, expected in (('классика', 1), ('толстой', 2)):
+            with self.subTest(query=query):
+                response = self.search(query)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, expected
+                )
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        post = Post.objects.create(text='Анна', author=PostSearchTest.user)
+        post.text = 'Вронский'
+        post.save()
+        self.assertEqual(
+            self.search('анна').context['page_obj'].paginator.count, 0
+        )
+        self.assertEqual(
+            self.search('вронский').context['page_obj'].paginator.count, 1
+        )
+        post.delete()
+        self.assertEqual(
+            self.search('вронский').context['page_obj'].paginator.count, 0
+        )
+
+    def test_fts_syntax_in_query_is_harmless(self):
+        """Кавычки и операторы FTS5 в запросе не ломают поиск"""
+        for query in ('"семьи', 'семьи AND OR NOT', '*', 'NEAR(', ''):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+
+    def test_rebuild_command_restores_index(self):
+        """Команда rebuild_search_index заполняет индекс заново"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            self.search('семьи').context['page_obj'].paginator.count, 2
+        )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по индексу FTS5"""
+        admin = PostAdmin(Post, AdminSite())
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'похожи'
+        )
+        self.assertIn(FTS_TABLE, str(queryset.query))
+        self.assertEqual(list(queryset), [PostSearchTest.post])
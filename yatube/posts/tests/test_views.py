@@ -1,17 +1,42 @@
+from io import StringIO
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Post, Group, User
+from core.cache import shared_cache
+from posts.constants import COMMENT_QTY, LISTING_CACHE_TIMEOUT
+from posts.models import (
+    Comment,
+    FeedEntry,
+    Follow,
+    Post,
+    Group,
+    ThumbnailJob,
+    User,
+)
+from posts.thumbnails import job_files, run_job
 
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -233,12 +258,37 @@ class PaginatorViewsTest(TestCase):
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(len(response.context['page_obj']), 10)
 
+    def get_second_page(self, url):
+        """Переходит на вторую страницу по курсору из первой"""
+        first_page = self.authorized_client.get(url).context['page_obj']
+        return self.authorized_client.get(
+            f'{url}?cursor={first_page.next_cursor}'
+        )
+
     def test_index_second_page_contains_two_records(self):
         """Проверка, что на второй странице index 3 поста"""
+        response = self.get_second_page(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertIsNone(response.context['page_obj'].next_cursor)
+
+    def test_index_previous_cursor_returns_first_page(self):
+        """Курсор назад со второй страницы возвращает первую страницу"""
+        url = reverse('posts:index')
+        first_page = self.authorized_client.get(url).context['page_obj']
+        second_page = self.get_second_page(url).context['page_obj']
         response = self.authorized_client.get(
-            (reverse('posts:index') + '?page=2')
+            f'{url}?cursor={second_page.previous_cursor}'
         )
-        self.assertEqual(len(response.context['page_obj']), 3)
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), list(first_page))
+        self.assertIsNone(page_obj.previous_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор отдаёт первую страницу"""
+        response = self.authorized_client.get(
+            reverse('posts:index') + '?cursor=broken'
+        )
+        self.assertEqual(len(response.context['page_obj']), 10)
 
     def test_group_list_first_page_contains_ten_records(self):
         """Проверка, что паджинатор выводит 10 записей на страницу"""
@@ -249,9 +299,8 @@ class PaginatorViewsTest(TestCase):
 
     def test_group_list_second_page_contains_two_records(self):
         """Проверка, что на второй странице group_list 3 поста"""
-        response = self.authorized_client.get(
-            (reverse('posts:group_list', kwargs={'slug': 'test-slug1'}))
-            + '?page=2'
+        response = self.get_second_page(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug1'})
         )
         self.assertEqual(len(response.context['page_obj']), 3)
 
@@ -264,11 +313,8 @@ class PaginatorViewsTest(TestCase):
 
     def test_profile_second_page_contains_two_records(self):
         """Проверка, что на второй странице profile 3 поста"""
-        response = self.authorized_client.get(
-            (
-                reverse('posts:profile', kwargs={'username': 'author'})
-                + '?page=2'
-            )
+        response = self.get_second_page(
+            reverse('posts:profile', kwargs={'username': 'author'})
         )
         self.assertEqual(len(response.context['page_obj']), 3)
 
@@ -381,6 +427,26 @@ class FollowTest(TestCase):
         follower_subscribed_to = Follow.objects.all()
         self.assertEqual(len(follower_subscribed_to), 0)
 
+    def test_follow_json(self):
+        """С Accept: application/json подписка отвечает новым состоянием"""
+        for name, following, count in (
+            ('posts:profile_follow', True, 1),
+            ('posts:profile_unfollow', False, 0),
+        ):
+            with self.subTest(name=name):
+                response = self.authorized_client1.get(
+                    reverse(name, kwargs={'username': self.user2.username}),
+                    HTTP_ACCEPT='application/json',
+                )
+                self.assertEqual(
+                    response.json(),
+                    {
+                        'author': self.user2.username,
+                        'following': following,
+                        'followers_count': count,
+                    },
+                )
+
     def test_new_author_post_on_follow_index_page(self):
         """
         Новая запись автора видна только подписанному пользователю
@@ -397,3 +463,650 @@ class FollowTest(TestCase):
         response = self.authorized_client1.get(reverse('posts:follow_index'))
         post_list = response.context.get('page_obj').object_list
         self.assertEqual(len(post_list), 0)
+
+
+class CommentJsonTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CommentJsonTest.user)
+        self.url = reverse(
+            'posts:add_comment', kwargs={'post_id': CommentJsonTest.post.id}
+        )
+
+    def test_comment_json(self):
+        """JSON-клиент получает созданный комментарий или ошибки формы"""
+        response = self.authorized_client.post(
+            self.url, {'text': 'Привет'}, HTTP_ACCEPT='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['text'], 'Привет')
+        self.assertEqual(response.json()['author'], 'reader')
+        response = self.authorized_client.post(
+            self.url, {'text': ''}, HTTP_ACCEPT='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class PostLikesAnnotationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.fan = User.objects.create_user(username='fan')
+        cls.post = Post.objects.create(
+            text='Любимый пост', author=cls.user, likes_count=2
+        )
+        cls.post.likes.add(cls.user, cls.fan)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostLikesAnnotationTest.fan)
+        cache.clear()
+
+    def count_index_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse('posts:index'))
+        return len(queries)
+
+    def test_page_posts_have_like_state(self):
+        """Посты страницы получают число лайков и отметку «мне нравится»"""
+        response = self.authorized_client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(post.number_of_likes(), 2)
+        self.assertTrue(post.liked_by_me)
+
+    def test_like_queries_do_not_grow_with_page_size(self):
+        """Число запросов ленты не зависит от количества постов"""
+        expected = self.count_index_queries()
+        for number in range(9):
+            post = Post.objects.create(text=f'Пост {number}', author=self.user)
+            post.likes.add(self.fan)
+        self.assertEqual(self.count_index_queries(), expected)
+
+
+class PostLikeCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост для лайков', author=cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostLikeCounterTest.user)
+        self.like_url = reverse('posts:blogpost_like', kwargs={'pk': 1})
+
+    def test_like_and_unlike_update_counter(self):
+        """Лайк и повторный клик меняют сохранённый счётчик лайков"""
+        self.authorized_client.post(self.like_url, HTTP_REFERER='/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertTrue(self.post.likes.filter(id=self.user.id).exists())
+
+        self.authorized_client.post(self.like_url, HTTP_REFERER='/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertFalse(self.post.likes.exists())
+
+    def test_like_intents_are_idempotent(self):
+        """Повтор like или unlike ничего не меняет, ответ – новое состояние"""
+        for action, liked, count in (
+            ('like', True, 1),
+            ('like', True, 1),
+            ('unlike', False, 0),
+            ('unlike', False, 0),
+        ):
+            with self.subTest(action=action):
+                response = self.authorized_client.post(
+                    self.like_url,
+                    {'action': action},
+                    HTTP_ACCEPT='application/json',
+                )
+                self.assertEqual(
+                    response.json(), {'liked': liked, 'likes_count': count}
+                )
+                self.post.refresh_from_db()
+                self.assertEqual(self.post.likes_count, count)
+                self.assertEqual(self.post.likes.count(), count)
+
+    def test_toggle_lost_to_concurrent_like_reports_like(self):
+        """Если лайк вставил соседний запрос, toggle отвечает liked=True"""
+
+        def concurrent_insert(post_id, user_id):
+            Post.likes.through.objects.create(
+                post_id=post_id, user_id=user_id
+            )
+            return 0
+
+        with mock.patch(
+            'posts.likes.insert_like', side_effect=concurrent_insert
+        ):
+            response = self.authorized_client.post(
+                self.like_url,
+                {'action': 'toggle'},
+                HTTP_ACCEPT='application/json',
+            )
+        self.assertTrue(response.json()['liked'])
+
+    def test_unlike_with_drifted_counter(self):
+        """Unlike при разъехавшемся счётчике не уводит его ниже нуля"""
+        for returning in (True, False):
+            with self.subTest(returning=returning):
+                Post.likes.through.objects.create(
+                    post=self.post, user=self.user
+                )
+                Post.objects.filter(id=self.post.id).update(likes_count=0)
+                with mock.patch(
+                    'posts.likes.can_return_from_update',
+                    return_value=returning,
+                ):
+                    response = self.authorized_client.post(
+                        self.like_url,
+                        {'action': 'unlike'},
+                        HTTP_ACCEPT='application/json',
+                    )
+                self.assertEqual(
+                    response.json(), {'liked': False, 'likes_count': 0}
+                )
+
+    def test_like_of_missing_post_is_not_found(self):
+        """Лайк несуществующего поста – 404, а не ошибка целостности"""
+        response = self.authorized_client.post(
+            reverse('posts:blogpost_like', kwargs={'pk': 999}),
+            {'action': 'like'},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Post.likes.through.objects.exists())
+
+    def test_orm_like_changes_update_counter(self):
+        """Лайки, изменённые через ORM или админку, обновляют счётчик"""
+        changes = (
+            (lambda: self.post.likes.add(self.user), 1),
+            (lambda: self.user.post_likes.clear(), 0),
+            (lambda: self.user.post_likes.add(self.post), 1),
+            (lambda: self.post.likes.remove(self.user), 0),
+            (lambda: self.post.likes.set([self.user]), 1),
+            (lambda: self.post.likes.clear(), 0),
+        )
+        for change, count in changes:
+            change()
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.likes_count, count)
+
+    def test_recount_likes_repairs_drift(self):
+        """Команда recount_likes исправляет разъехавшийся счётчик"""
+        self.post.likes.add(self.user)
+        Post.objects.filter(id=self.post.id).update(likes_count=42)
+        call_command('recount_likes', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+
+class FollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(FollowFeedTest.reader)
+        cache.clear()
+
+    def get_feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        """
+        Подписка добавляет в ленту старые посты автора,
+        новые посты раскладываются подписчикам при создании
+        """
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.get_feed(), [self.old_post])
+
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=new_post).exists()
+        )
+        self.assertEqual(self.get_feed(), [new_post, self.old_post])
+
+    def test_unfollow_trims_feed(self):
+        """Отписка убирает посты автора из ленты"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.get_feed(), [])
+
+    def test_popular_author_is_read_on_the_fly(self):
+        """Посты популярного автора не раскладываются, а читаются на лету"""
+        with mock.patch('posts.feed.FANOUT_LIMIT', 1):
+            Follow.objects.create(user=self.reader, author=self.author)
+            new_post = Post.objects.create(text='Хит', author=self.author)
+            self.assertFalse(FeedEntry.objects.exists())
+            self.assertEqual(self.get_feed(), [new_post, self.old_post])
+
+    def test_author_leaving_popular_set_is_fanned_out_again(self):
+        """Автор выпал из популярных: его посты остаются в лентах"""
+        fan = User.objects.create_user(username='fan')
+        with mock.patch('posts.feed.FANOUT_LIMIT', 2):
+            Follow.objects.create(user=fan, author=self.author)
+            Follow.objects.create(user=self.reader, author=self.author)
+            hot_post = Post.objects.create(text='Хит', author=self.author)
+            self.assertEqual(self.get_feed(), [hot_post, self.old_post])
+            Follow.objects.filter(user=fan).delete()
+            self.assertEqual(self.get_feed(), [hot_post, self.old_post])
+
+    def test_feed_is_capped(self):
+        """В ленте хранится не больше FEED_MAX_ENTRIES свежих записей"""
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        with mock.patch('posts.feed.FEED_MAX_ENTRIES', 1):
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            list(
+                FeedEntry.objects.filter(user=self.reader).values_list(
+                    'post_id', 'pub_date'
+                )
+            ),
+            [(new_post.id, new_post.pub_date)],
+        )
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Старая группа', slug='cards', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Исходный текст', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostCardCacheTest.user)
+        cache.clear()
+
+    def get_index(self):
+        return self.authorized_client.get(reverse('posts:index'))
+
+    def test_card_is_cached_until_post_is_saved(self):
+        """Карточка поста кэшируется и обновляется после сохранения поста"""
+        self.get_index()
+        Post.objects.filter(id=self.post.id).update(text='Тихая правка')
+        self.assertContains(self.get_index(), 'Исходный текст')
+
+        post = Post.objects.get(id=self.post.id)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertContains(self.get_index(), 'Новый текст')
+
+    def test_group_rename_invalidates_card(self):
+        """Переименование группы сбрасывает закэшированные карточки"""
+        self.get_index()
+        self.group.title = 'Новая группа'
+        self.group.save()
+        self.assertContains(self.get_index(), 'Новая группа')
+
+    def test_like_state_is_not_cached(self):
+        """Кнопка лайка рендерится на каждый запрос"""
+        self.get_index()
+        self.post.likes.add(self.user)
+        self.assertContains(self.get_index(), '💔')
+
+
+class ListingPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='listing', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.user, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:group_list', kwargs={'slug': 'listing'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_anonymous_listing_is_served_from_cache(self):
+        """Гость получает страницу группы и профиля из кэша"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertContains(response, 'Первый пост')
+
+    def test_generation_keys_expire(self):
+        """Ключи поколений, даже для несуществующей группы, не вечные"""
+        url = reverse('posts:group_list', kwargs={'slug': 'missing'})
+        shared = shared_cache()
+        with mock.patch.object(shared, 'set', wraps=shared.set) as set_key:
+            self.guest_client.get(url)
+        timeouts = [
+            call.args[2] for call in set_key.call_args_list
+            if call.args[0].startswith('listing_gen:')
+        ]
+        self.assertEqual(timeouts, [LISTING_CACHE_TIMEOUT])
+
+    def test_new_and_deleted_posts_invalidate_listing(self):
+        """Создание и удаление поста сбрасывают кэш страниц"""
+        for url in self.urls:
+            self.guest_client.get(url)
+        post = Post.objects.create(
+            text='Свежий пост', author=self.user, group=self.group
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+        post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotContains(
+                    self.guest_client.get(url), 'Свежий пост'
+                )
+
+    def test_moving_post_to_other_group_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает кэш прежней группы"""
+        url = self.urls[0]
+        self.guest_client.get(url)
+        other = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        self.post.group = other
+        self.post.save()
+        self.assertNotContains(self.guest_client.get(url), 'Первый пост')
+
+
+class PostDetailQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='detail', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.user, group=cls.group
+        )
+        cls.post.likes.add(cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostDetailQueriesTest.user)
+        self.url = reverse('posts:post_detail', kwargs={'post_id': 1})
+
+    def add_comments(self, number):
+        for _ in range(number):
+            index = User.objects.count()
+            commenter = User.objects.create_user(username=f'reader{index}')
+            Comment.objects.create(
+                post=self.post, author=commenter, text=f'Коммент {index}'
+            )
+
+    def test_query_count_does_not_depend_on_comments(self):
+        """
+        post_detail укладывается в фиксированное число запросов:
+        сессия, пользователь, пост с аннотациями и комментарии с авторами
+        """
+        for comments in (1, 10):
+            with self.subTest(comments=comments):
+                self.add_comments(comments)
+                with self.assertNumQueries(4):
+                    self.authorized_client.get(self.url)
+
+    def test_context_has_author_stats_and_like_state(self):
+        """Пост в контексте содержит число постов автора и отметку лайка"""
+        response = self.authorized_client.get(self.url)
+        post = response.context['post']
+        self.assertEqual(post.author_posts_count, 1)
+        self.assertTrue(post.liked_by_me)
+
+
+class PostCommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.user)
+        Comment.objects.bulk_create(
+            [
+                Comment(post=cls.post, author=cls.user, text=f'Коммент {i}')
+                for i in range(COMMENT_QTY + 5)
+            ]
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.detail_url = reverse('posts:post_detail', kwargs={'post_id': 1})
+        self.comments_url = reverse(
+            'posts:post_comments', kwargs={'post_id': 1}
+        )
+
+    def test_post_detail_shows_first_comments_page(self):
+        """На странице поста только первая пачка комментариев"""
+        response = self.guest_client.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENT_QTY)
+        self.assertEqual(comments[0].text, 'Коммент 0')
+        self.assertIsNotNone(comments.next_cursor)
+
+    def test_fragment_endpoint_returns_next_batch(self):
+        """Фрагмент по курсору отдаёт оставшиеся комментарии"""
+        cursor = self.guest_client.get(self.detail_url).context[
+            'comments'
+        ].next_cursor
+        response = self.guest_client.get(
+            self.comments_url, {'cursor': cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertContains(response, f'Коммент {COMMENT_QTY + 4}')
+
+    def test_json_newest_first(self):
+        """JSON-ответ с сортировкой «сначала новые»"""
+        response = self.guest_client.get(
+            self.comments_url,
+            {'order': 'newest'},
+            HTTP_ACCEPT='application/json',
+        )
+        data = response.json()
+        self.assertEqual(len(data['comments']), COMMENT_QTY)
+        self.assertEqual(
+            data['comments'][0]['text'], f'Коммент {COMMENT_QTY + 4}'
+        )
+        self.assertIsNotNone(data['next_cursor'])
+
+
+class ProfileStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        Post.objects.create(text='Пост 1', author=cls.author)
+        Post.objects.create(text='Пост 2', author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.other)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(ProfileStatsTest.reader)
+        self.url = reverse('posts:profile', kwargs={'username': 'author'})
+        cache.clear()
+
+    def test_profile_context_has_author_stats(self):
+        """Профиль получает статистику автора и статус подписки"""
+        response = self.reader_client.get(self.url)
+        author = response.context['author']
+        self.assertEqual(author.posts_count, 2)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.following_count, 1)
+        self.assertTrue(response.context['following'])
+        self.assertNotIn('post_list', response.context)
+
+    def test_profile_query_count(self):
+        """
+        Профиль: сессия, пользователь, автор со статистикой,
+        страница постов и лайки читателя
+        """
+        with self.assertNumQueries(5):
+            self.reader_client.get(self.url)
+
+    def test_follow_invalidates_cached_profile(self):
+        """Подписка сбрасывает закэшированный профиль автора"""
+        guest_client = Client()
+        guest_client.get(self.url)
+        Follow.objects.create(user=self.other, author=self.author)
+        response = guest_client.get(self.url)
+        self.assertEqual(response.context['author'].followers_count, 2)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailJobsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ThumbnailJobsTest.user)
+        cache.clear()
+
+    def create_post_with_image(self, text='С картинкой'):
+        uploaded = SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': text, 'image': uploaded},
+        )
+        return Post.objects.get(text=text)
+
+    def test_create_enqueues_job_and_shows_placeholder(self):
+        """Создание поста ставит миниатюры в очередь, до готовности заглушка"""
+        post = self.create_post_with_image()
+        job = ThumbnailJob.objects.get(post=post)
+        self.assertEqual(job.status, ThumbnailJob.PENDING)
+        self.assertContains(
+            self.authorized_client.get(reverse('posts:index')),
+            'Картинка обрабатывается',
+        )
+
+    def test_finished_job_renders_thumbnail(self):
+        """Готовое задание подставляет миниатюру в ленту и пост"""
+        post = self.create_post_with_image()
+        job = ThumbnailJob.objects.get(post=post)
+        run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, job.url)
+                self.assertContains(response, f'srcset="{job.srcset}"')
+                self.assertContains(response, 'loading="lazy"')
+                self.assertNotContains(response, 'Картинка обрабатывается')
+
+    def test_failed_job_falls_back_to_original(self):
+        """Если миниатюру сделать не удалось, показывается оригинал"""
+        post = self.create_post_with_image()
+        ThumbnailJob.objects.filter(post=post).update(
+            status=ThumbnailJob.FAILED
+        )
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.authorized_client.get(url)
+                self.assertContains(response, f'src="{post.image.url}"')
+                self.assertNotContains(response, 'Картинка обрабатывается')
+
+    def test_derivatives_have_content_hashed_names(self):
+        """Копии картинки названы по хэшу содержимого и лежат в хранилище"""
+        post = self.create_post_with_image()
+        job = ThumbnailJob.objects.get(post=post)
+        run_job(job.id)
+        job.refresh_from_db()
+        names = job_files(job)
+        self.assertTrue(names)
+        for name in names:
+            with self.subTest(name=name):
+                self.assertRegex(name, r'-\d+w\.[0-9a-f]{12}\.(jpg|webp)$')
+                self.assertTrue(default_storage.exists(name))
+
+    def test_feed_loads_thumbnails_in_one_query(self):
+        """Адреса миниатюр страницы ленты читаются одним запросом"""
+        for number in range(3):
+            post = self.create_post_with_image(f'С картинкой {number}')
+            run_job(ThumbnailJob.objects.get(post=post).id)
+        cache.clear()
+        for expected in (1, 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.authorized_client.get(reverse('posts:index'))
+            job_queries = [
+                query for query in queries.captured_queries
+                if 'posts_thumbnailjob' in query['sql']
+            ]
+            with self.subTest(expected=expected):
+                self.assertEqual(len(job_queries), expected)
+                self.assertNotContains(response, 'Картинка обрабатывается')
+
+    def test_process_thumbnails_runs_pending_jobs(self):
+        """process_thumbnails выполняет очередь и печатает итог"""
+        post = self.create_post_with_image()
+        out = StringIO()
+        call_command('process_thumbnails', stdout=out)
+        job = ThumbnailJob.objects.get(post=post)
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+        self.assertIn('Готово: 1, с ошибкой: 0', out.getvalue())
+
+    def test_warm_thumbnails_restores_missing_files(self):
+        """warm_thumbnails создаёт задания и пересоздаёт пропавшие файлы"""
+        post = Post.objects.create(
+            author=ThumbnailJobsTest.user,
+            text='Без задания',
+            image=SimpleUploadedFile('warm.gif', SMALL_GIF, 'image/gif'),
+        )
+        call_command('warm_thumbnails', stdout=StringIO())
+        job = ThumbnailJob.objects.get(post=post)
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+        thumbnail = job.url.replace(settings.MEDIA_URL, '', 1)
+        default_storage.delete(thumbnail)
+        call_command('warm_thumbnails', '--verify', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+        self.assertTrue(default_storage.exists(thumbnail))
@@ -0,0 +1,39 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FEED_TABLES = ('posts_post', 'posts_comment', 'posts_feedentry')
+
+
+def explain_query_plan(sql):
+    """Строки EXPLAIN QUERY PLAN для запроса SQLite"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def sorts_in_temp_tree(plan):
+    """Результат сортируется во временном B-дереве, а не читается по индексу"""
+    return any('USE TEMP B-TREE FOR ORDER BY' in step for step in plan)
+
+
+def unindexed_feed_queries(client, url):
+    """
+    Выполняет запрос к странице и возвращает SELECT'ы лент с LIMIT,
+    которые сортируют строки во временном B-дереве: такой запрос
+    сначала собирает все подходящие строки, а потом отрезает страницу.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    failed = []
+    for query in queries.captured_queries:
+        sql = query['sql']
+        if (
+            not sql.startswith('SELECT')
+            or ' LIMIT ' not in sql
+            or not any(table in sql for table in FEED_TABLES)
+        ):
+            continue
+        plan = explain_query_plan(sql)
+        if sorts_in_temp_tree(plan):
+            failed.append((sql, plan))
+    return failed
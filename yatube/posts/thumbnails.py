@@ -0,0 +1,144 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .cache import bump_card_version, bump_post_listings, forget_thumbnails
+from .constants import THUMBNAIL_SIZES
+from .images import build_srcset, make_derivatives
+from .models import ThumbnailJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def enqueue_thumbnails(post):
+    """Ставит миниатюры в очередь; задания запустятся после коммита"""
+    forget_thumbnails(post.id)
+    if not post.image:
+        ThumbnailJob.objects.filter(post=post).delete()
+        return
+    job_ids = []
+    for geometry in THUMBNAIL_SIZES:
+        job, _ = ThumbnailJob.objects.update_or_create(
+            post=post,
+            geometry=geometry,
+            defaults={
+                'source': post.image.name,
+                'status': ThumbnailJob.PENDING,
+                'url': '',
+                'srcset': '',
+                'webp_srcset': '',
+                'error': '',
+            },
+        )
+        job_ids.append(job.id)
+    transaction.on_commit(lambda: submit_jobs(job_ids))
+
+
+def submit_jobs(job_ids):
+    """Отдаёт задания пулу потоков (или выполняет сразу без воркеров)"""
+    for job_id in job_ids:
+        if settings.THUMBNAIL_WORKERS:
+            get_executor().submit(run_in_worker, job_id)
+        else:
+            run_job(job_id)
+
+
+def run_in_worker(job_id):
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception('Thumbnail job %s crashed', job_id)
+    finally:
+        connection.close()
+
+
+def run_job(job_id):
+    job = (
+        ThumbnailJob.objects.select_related('post')
+        .filter(id=job_id, status=ThumbnailJob.PENDING)
+        .first()
+    )
+    if job is None or job.post.image.name != job.source:
+        return
+    try:
+        derivatives = make_derivatives(
+            job.source, job.geometry, THUMBNAIL_SIZES[job.geometry]
+        )
+    except Exception as error:
+        logger.warning('Thumbnail job %s failed: %s', job_id, error)
+        job.status, job.error = ThumbnailJob.FAILED, str(error)
+    else:
+        jpeg = derivatives['jpg']
+        base_width = int(job.geometry.split('x')[0])
+        fallback = [
+            name for width, name in jpeg if width <= base_width
+        ] or [jpeg[0][1]]
+        job.url = default_storage.url(fallback[-1])
+        job.srcset = build_srcset(jpeg)
+        job.webp_srcset = build_srcset(derivatives.get('webp', ()))
+        job.status = ThumbnailJob.DONE
+    job.save(
+        update_fields=(
+            'url', 'srcset', 'webp_srcset', 'status', 'error', 'updated'
+        )
+    )
+    # и ошибка меняет картинку: вместо заглушки показывается оригинал
+    forget_thumbnails(job.post_id)
+    bump_card_version('post', job.post_id)
+    bump_post_listings(job.post)
+
+
+def pending_job_ids():
+    return list(
+        ThumbnailJob.objects.filter(status=ThumbnailJob.PENDING).values_list(
+            'id', flat=True
+        )
+    )
+
+
+def run_pending_jobs():
+    """Выполняет задания, оставшиеся в очереди; вернёт их число"""
+    job_ids = pending_job_ids()
+    for job_id in job_ids:
+        run_job(job_id)
+    return len(job_ids)
+
+
+def submit_pending_jobs():
+    """Отдаёт очередь пулу потоков, как после сохранения поста"""
+    job_ids = pending_job_ids()
+    submit_jobs(job_ids)
+    return len(job_ids)
+
+
+def job_counts():
+    """Число заданий по статусам одним запросом"""
+    return dict(
+        ThumbnailJob.objects.values_list('status').annotate(Count('id'))
+    )
+
+
+def job_files(job):
+    """Имена в хранилище всех копий готового задания"""
+    names = []
+    for srcset in (job.srcset, job.webp_srcset):
+        for candidate in filter(None, srcset.split(', ')):
+            url = candidate.rsplit(' ', 1)[0]
+            names.append(url[len(settings.MEDIA_URL):])
+    return names
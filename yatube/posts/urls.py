@@ -13,8 +13,14 @@ urlpatterns = [
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -28,3 +34,22 @@ urlpatterns = [
     path('blogpost-like/<int:pk>', views.PostLike, name="blogpost_like"),
     # path('api/v1/posts/<int:pk>/', views.get_post),  # новое
 ]
+
+# Бюджет SQL-запросов на запрос авторизованного пользователя с холодным
+# кэшем; не зависит от числа постов и комментариев на странице
+# (core/tests/test_query_budgets.py)
+QUERY_BUDGETS = {
+    'index': 5,
+    'group_list': 6,
+    'post_detail': 5,
+    'post_create': 3,
+    'post_edit': 6,
+    'add_comment': 3,
+    'post_comments': 2,
+    'profile': 6,
+    'follow_index': 7,
+    'search': 2,
+    'profile_follow': 4,
+    'profile_unfollow': 8,
+    'blogpost_like': 7,
+}
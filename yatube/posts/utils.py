@@ -0,0 +1,101 @@
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from .cache import attach_card_versions, attach_thumbnails
+from .models import Follow, Post
+
+
+def attach_likes(posts, user):
+    """Отмечает liked_by_me у постов страницы одним запросом"""
+    posts = list(posts)
+    if not posts:
+        return
+    liked = set()
+    if user.is_authenticated:
+        liked = set(
+            Post.likes.through.objects.filter(
+                post_id__in=[post.id for post in posts], user_id=user.id
+            ).values_list('post_id', flat=True)
+        )
+    for post in posts:
+        post.liked_by_me = post.id in liked
+
+
+def related_count(queryset, field, outer_field='pk'):
+    """Подзапрос: число строк queryset, ссылающихся на внешнюю строку"""
+    counted = (
+        queryset.filter(**{field: OuterRef(outer_field)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted), 0)
+
+
+def actual_likes_count():
+    """Подзапрос: настоящее число лайков внешнего поста"""
+    return related_count(Post.likes.through.objects, 'post_id')
+
+
+def prepare_page(page_obj, user):
+    """Готовит посты страницы ленты к рендеру без запросов на карточку"""
+    attach_likes(page_obj, user)
+    attach_card_versions(page_obj)
+    attach_thumbnails(page_obj)
+
+
+def author_posts_count():
+    """Подзапрос: число постов автора внешнего поста"""
+    return related_count(Post.objects, 'author_id', 'author_id')
+
+
+def author_stats(user):
+    """Счётчики постов и подписок автора и подписан ли на него user"""
+    if user.is_authenticated:
+        is_followed = Exists(
+            Follow.objects.filter(user_id=user.id, author_id=OuterRef('pk'))
+        )
+    else:
+        is_followed = Value(False, output_field=BooleanField())
+    return {
+        'posts_count': related_count(Post.objects, 'author_id'),
+        'followers_count': related_count(Follow.objects, 'author_id'),
+        'following_count': related_count(Follow.objects, 'user_id'),
+        'is_followed': is_followed,
+    }
+
+
+def liked_by(user):
+    """EXISTS: внешний пост лайкнул пользователь"""
+    if not user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    return Exists(
+        Post.likes.through.objects.filter(
+            post_id=OuterRef('pk'), user_id=user.id
+        )
+    )
+
+
+def wants_json(request):
+    """Клиент просит JSON вместо HTML (заголовок Accept или ?format=json)"""
+    return (
+        request.GET.get('format') == 'json'
+        or 'application/json' in request.META.get('HTTP_ACCEPT', '')
+    )
+
+
+def comment_json(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'pub_date': comment.pub_date.isoformat(),
+    }
@@ -1,18 +1,38 @@
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+)
 from django.shortcuts import (
     get_object_or_404,
     redirect,
     render,
 )
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 from django.views.generic.detail import DetailView
 
-from .constants import POST_QTY, RUNOUT
+from .cache import attach_thumbnails, cache_listing
+from .constants import COMMENT_QTY, POST_QTY, RUNOUT
+from .feed import follow_feed
 from .forms import CommentForm, PostForm
+from .likes import ACTIONS, TOGGLE, set_like
 from .models import Group, Post, Follow, User
-from .paginator import paginate_page
+from .paginator import paginate_comments, paginate_page
+from .search import SearchResults
+from .thumbnails import enqueue_thumbnails
+from .utils import (
+    author_posts_count,
+    author_stats,
+    comment_json,
+    liked_by,
+    prepare_page,
+    wants_json,
+)
 
 from posts.models import User
 
@@ -28,6 +48,7 @@ def index(request):
         'group',
     )
     page_obj = paginate_page(request, post_list, POST_QTY)
+    prepare_page(page_obj, request.user)
     context = {
         'page_obj': page_obj,
         'title': title,
@@ -36,11 +57,13 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@cache_listing('group', 'slug')
 def group_posts(request, slug):
     title = 'Записи сообщества'
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author', 'group')
     page_obj = paginate_page(request, post_list, POST_QTY)
+    prepare_page(page_obj, request.user)
     context = {
         'page_obj': page_obj,
         'group': group,
@@ -49,29 +72,36 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_listing('profile', 'username')
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.annotate(**author_stats(request.user)),
+        username=username,
+    )
     post_list = author.posts.select_related('group', 'author')
     page_obj = paginate_page(request, post_list, POST_QTY)
-    fav_authors = (
-        Follow.objects.filter(user_id=request.user.id)
-        .all()
-        .values_list('author_id', flat=True)
-    )
-    following = True if author.id in fav_authors else False
+    prepare_page(page_obj, request.user)
     context = {
         'author': author,
-        'post_list': post_list,
         'page_obj': page_obj,
-        'following': following,
+        'following': author.is_followed,
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group').annotate(
+            author_posts_count=author_posts_count(),
+            liked_by_me=liked_by(request.user),
+        ),
+        id=post_id,
+    )
+    attach_thumbnails([post])
     form = CommentForm()
-    comments = post.comments.all()
+    comments = paginate_comments(
+        request, post.comments.select_related('author'), COMMENT_QTY
+    )
     context = {
         'post': post,
         'comments': comments,
@@ -80,6 +110,25 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    comments = paginate_comments(
+        request, post.comments.select_related('author'), COMMENT_QTY
+    )
+    if wants_json(request):
+        return JsonResponse(
+            {
+                'comments': [comment_json(comment) for comment in comments],
+                'next_cursor': comments.next_cursor,
+            }
+        )
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
     if request.method == 'POST':
@@ -88,6 +137,7 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            enqueue_thumbnails(post)
             user_name = request.user.username
             return redirect(reverse('posts:profile', args=[user_name]))
         return render(request, 'posts/create_post.html', {'form': form})
@@ -109,6 +159,8 @@ def post_edit(request, post_id):
             )
             if form.is_valid():
                 form.save()
+                if 'image' in form.changed_data:
+                    enqueue_thumbnails(post)
                 return redirect(reverse('posts:post_detail', args=[post_id]))
 
         post = get_object_or_404(Post, id=post_id)
@@ -121,7 +173,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = Post.objects.get(id=post_id)
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
 
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -129,6 +181,10 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        if wants_json(request):
+            return JsonResponse(comment_json(comment), status=201)
+    elif wants_json(request):
+        return JsonResponse({'errors': form.errors}, status=400)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -136,8 +192,9 @@ def add_comment(request, post_id):
 def follow_index(request):
     title = 'Избранные авторы'
     follower = request.user
-    post_list = Post.objects.filter(author__following__user=follower)
+    post_list = follow_feed(follower)
     page_obj = paginate_page(request, post_list, POST_QTY)
+    prepare_page(page_obj, request.user)
     context = {
         'page_obj': page_obj,
         'title': title,
@@ -147,31 +204,69 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+def search(request):
+    """Поиск по тексту, группе и автору, лучшие совпадения первыми"""
+    query = request.GET.get('q', '').strip()
+    page_obj = paginate_page(
+        request, SearchResults(query), POST_QTY, numbered=True
+    )
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'page_params': f'{urlencode({"q": query})}&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def follow_response(request, author, following):
+    """JSON с новым состоянием подписки или возврат в профиль"""
+    if wants_json(request):
+        return JsonResponse(
+            {
+                'author': author.username,
+                'following': following,
+                'followers_count': Follow.objects.filter(
+                    author_id=author.id
+                ).count(),
+            }
+        )
+    return redirect(
+        reverse('posts:profile', kwargs={'username': author.username})
+    )
+
+
 @login_required
 def profile_follow(request, username):
     follower = request.user
-    followed = User.objects.get(username=username)
+    followed = get_object_or_404(User, username=username)
     if follower.id != followed.id:
         Follow.objects.get_or_create(user=follower, author=followed)
-    return redirect(reverse('posts:profile', kwargs={'username': username}))
+    return follow_response(request, followed, follower.id != followed.id)
 
 
 @login_required
 def profile_unfollow(request, username):
     follower = request.user
-    followed = User.objects.get(username=username)
+    followed = get_object_or_404(User, username=username)
     follow_qs = Follow.objects.filter(user=follower, author=followed)
     follow_qs.delete()
-    return redirect(reverse('posts:profile', kwargs={'username': username}))
+    return follow_response(request, followed, False)
 
 
 @login_required
+@require_POST
 def PostLike(request, pk):
-    post = get_object_or_404(Post, id=pk)
-    pervious_url = request.META.get('HTTP_REFERER')
-    if post.likes.filter(id=request.user.id).exists():
-        post.likes.remove(request.user)
-    else:
-        post.likes.add(request.user)
-
-    return HttpResponseRedirect(pervious_url)
+    """Лайк одной транзакцией: like/unlike идемпотентны, иначе toggle"""
+    action = request.POST.get('action', TOGGLE)
+    if action not in ACTIONS:
+        return HttpResponseBadRequest('action: like, unlike или toggle')
+    result = set_like(pk, request.user.id, action)
+    if result is None:
+        raise Http404('Пост не найден')
+    liked, likes_count = result
+    if wants_json(request):
+        return JsonResponse({'liked': liked, 'likes_count': likes_count})
+    return HttpResponseRedirect(
+        request.META.get('HTTP_REFERER')
+        or reverse('posts:post_detail', kwargs={'post_id': pk})
+    )
@@ -0,0 +1,16 @@
+// Подгружает следующую пачку комментариев без перезагрузки страницы
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('.js-more-comments');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.url, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+    .then(function (response) { return response.text(); })
+    .then(function (html) {
+      link.closest('.comments-more').outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
@@ -0,0 +1,126 @@
+// Лайки, подписки и комментарии без перезагрузки страницы.
+// Без JavaScript или при ошибке формы и ссылки работают как обычно.
+(function () {
+  var JSON_HEADERS = {'Accept': 'application/json'};
+
+  function fallback(element, button) {
+    if (element.tagName === 'FORM') {
+      if (button) {
+        // submit() не отправляет нажатую кнопку, а в ней намерение
+        var intent = document.createElement('input');
+        intent.type = 'hidden';
+        intent.name = button.name;
+        intent.value = button.value;
+        element.appendChild(intent);
+      }
+      element.submit();
+    } else {
+      window.location = element.href;
+    }
+  }
+
+  function send(element, url, options, button) {
+    options.headers = JSON_HEADERS;
+    options.credentials = 'same-origin';
+    return fetch(url, options).then(function (response) {
+      return response.json().then(function (data) {
+        if (!response.ok && response.status !== 400) {
+          throw new Error(response.status);
+        }
+        return {ok: response.ok, data: data};
+      });
+    }).catch(function () {
+      fallback(element, button);
+      // страница уходит на обычный запрос, продолжать нечего
+      return new Promise(function () {});
+    });
+  }
+
+  function updateLike(form, data) {
+    var button = form.querySelector('button[name="action"]');
+    button.value = data.liked ? 'unlike' : 'like';
+    button.textContent = data.liked ? '💔' : 'Мне нравится❤️';
+    var count = form.parentNode.querySelector('.js-like-count');
+    if (count) {
+      count.textContent = data.likes_count + ' это нравится';
+    }
+  }
+
+  function appendComment(form, data) {
+    var comments = document.getElementById('comments');
+    var item = document.createElement('div');
+    var body = document.createElement('div');
+    var title = document.createElement('h5');
+    var author = document.createElement('a');
+    var text = document.createElement('p');
+    item.className = 'media mb-4';
+    body.className = 'media-body';
+    title.className = 'mt-0';
+    author.href = form.dataset.profileUrl;
+    author.textContent = data.author;
+    text.textContent = data.text;
+    title.appendChild(author);
+    body.appendChild(title);
+    body.appendChild(text);
+    item.appendChild(body);
+    if (form.dataset.order === 'newest') {
+      comments.insertBefore(item, comments.firstChild);
+    } else if (!comments.querySelector('.comments-more')) {
+      // иначе комментарий придёт со следующей пачкой
+      comments.appendChild(item);
+    }
+    form.reset();
+  }
+
+  function updateFollow(link, data) {
+    link.href = data.following ? link.dataset.unfollow : link.dataset.follow;
+    link.textContent = data.following ? 'Отписаться' : 'Подписаться';
+    link.className = 'btn btn-lg js-follow ' + (
+      data.following ? 'btn-light' : 'btn-primary'
+    );
+    var count = document.querySelector('.js-followers-count');
+    if (count) {
+      count.textContent = data.followers_count;
+    }
+  }
+
+  document.addEventListener('submit', function (event) {
+    var form = event.target;
+    var like = form.classList.contains('js-like');
+    if (!like && !form.classList.contains('js-comment')) {
+      return;
+    }
+    event.preventDefault();
+    var body = new FormData(form);
+    var button = null;
+    if (like) {
+      // FormData не включает нажатую кнопку, а в ней намерение
+      button = (
+        event.submitter || form.querySelector('button[name="action"]')
+      );
+      body.set(button.name, button.value);
+    }
+    send(form, form.action, {method: 'POST', body: body}, button).then(
+      function (result) {
+        if (!result.ok) {
+          fallback(form, button);
+        } else if (like) {
+          updateLike(form, result.data);
+        } else {
+          appendComment(form, result.data);
+        }
+      }
+    );
+  });
+
+  document.addEventListener('click', function (event) {
+    var link = event.target.closest('.js-follow');
+    if (!link) {
+      return;
+    }
+    event.preventDefault();
+    send(link, link.href, {method: 'GET'}).then(function (result) {
+      updateFollow(link, result.data);
+    });
+  });
+})();
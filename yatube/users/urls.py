@@ -70,3 +70,16 @@ urlpatterns = [
         name='password_reset_complete',
     ),
 ]
+
+# Бюджет SQL-запросов (core/tests/test_query_budgets.py)
+QUERY_BUDGETS = {
+    'logout': 4,
+    'signup': 2,
+    'login': 2,
+    'password_change_form': 2,
+    'password_change_done': 2,
+    'password_reset_form': 2,
+    'password_reset_done': 2,
+    'password_reset_confirm': 5,
+    'password_reset_complete': 2,
+}
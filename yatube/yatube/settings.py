@@ -53,11 +53,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # первым, чтобы замеры охватывали и остальные middleware
+    'core.perf.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -97,10 +100,51 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        # соединение живёт между запросами (0 – закрывать после каждого)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Реплики для чтения лент: пути к SQLite-файлам через запятую. Локально
+# их наполняет manage.py sync_replicas; в тестах они зеркалят default.
+READ_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Вьюхи, которые читают с реплик
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+)
+# Сколько секунд после записи пользователь читает с основной базы
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+# PRAGMA для каждого нового соединения SQLite (core.sqlite): WAL не даёт
+# писателям (лайки, комментарии, подписки) блокировать читателей.
+# Сравнить с режимом по умолчанию: manage.py benchmark_sqlite
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    # отрицательное значение – размер в КБ
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -20000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'memory'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -156,10 +200,94 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Потоки для фоновой генерации миниатюр (0 – генерировать сразу
+# после коммита в том же процессе)
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+# Адаптивные копии картинок: в имени хэш содержимого, поэтому
+# файлы из этого каталога отдаются с вечным Cache-Control
+THUMBNAIL_DERIVATIVES_DIR = 'posts/derivatives'
+
+# Общий для всех процессов кэш (L2): locmem, file или redis
+# (для redis нужен пакет django-redis). Перед ним в каждом процессе
+# стоит короткоживущий L1 из core.cache.TwoLevelCache.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+SHARED_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoLevelCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 2)),
+        },
+    },
+    'shared': SHARED_CACHES[CACHE_BACKEND],
+}
+
+# Доля запросов, которые PerformanceMiddleware замеряет (0 – ни одного)
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', 0.01))
+# Токен для /-/perf/ без входа сотрудником: Authorization: Bearer <токен>
+PERF_METRICS_TOKEN = os.getenv('PERF_METRICS_TOKEN', '')
+
+# Журнал медленных SQL-запросов (opt-in): запросы дольше SLOW_QUERY_MS
+# пишутся с вьюхой, строкой кода и шаблона и планом EXPLAIN в ротируемый
+# файл; сводка – manage.py slowqueries
+SLOW_QUERY_LOG = bool(int(os.getenv('SLOW_QUERY_LOG', 0)))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+SLOW_QUERY_EXPLAIN = True
+SLOW_QUERY_FILE = os.getenv(
+    'SLOW_QUERY_FILE', os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'perf': {'format': '%(asctime)s perf %(message)s'},
+        'json': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'perf': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'perf',
+        },
+        'slowlog': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_FILE,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'encoding': 'utf-8',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'core.perf': {
+            'level': os.getenv('PERF_LOG_LEVEL', 'INFO'),
+            'handlers': ['perf'],
+            'propagate': False,
+        },
+        'core.slowlog': {
+            'level': 'WARNING',
+            'handlers': ['slowlog'],
+            'propagate': False,
+        },
+    },
 }
 
 # LOGGING = {
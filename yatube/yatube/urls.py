@@ -1,7 +1,11 @@
+import os
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import perf_metrics, serve_immutable
 
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
@@ -14,11 +18,20 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('-/perf/', perf_metrics, name='perf_metrics'),
 ]
 
 if settings.DEBUG:
     import debug_toolbar
 
+    derivatives = f'{settings.THUMBNAIL_DERIVATIVES_DIR}/'
+    urlpatterns.append(
+        re_path(
+            rf'^{settings.MEDIA_URL.lstrip("/")}{derivatives}(?P<path>.*)$',
+            serve_immutable,
+            {'document_root': os.path.join(settings.MEDIA_ROOT, derivatives)},
+        )
+    )
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )